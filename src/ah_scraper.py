@@ -1,12 +1,25 @@
 import asyncio
-from scrapling.defaults import StealthyFetcher
+import concurrent.futures
+import gzip
+import itertools
+import httpx
+from scrapling.fetchers import AsyncStealthySession
+from scrapling.parser import Selector
 import json
+import ijson
+import orjson
 import os
 from datetime import datetime, timedelta
+from operator import itemgetter
 import re
-import random
+import time
+import zlib
+from functools import lru_cache
 from pathlib import Path
+from collections import OrderedDict
 import logging
+from scrape_loop import run_on_scrape_loop, close_at_exit
+from cache_io import write_cache_file
 
 # Configure logging
 logging.basicConfig(
@@ -18,134 +31,355 @@ logger = logging.getLogger(__name__)
 # Cache settings
 CACHE_DIR = Path("cache")
 CACHE_DURATION = timedelta(hours=12)  # Base cache duration
-CACHE_DURATION_VARIANCE = timedelta(hours=4)  # Random variance to spread updates
+CACHE_DURATION_VARIANCE = timedelta(hours=4)  # Per-term variance to spread updates
+
+# In-memory LRU cache in front of the cache files:
+# lowercased search term -> (loaded at, cache file timestamp, products)
+MEM_CACHE_TTL = 60  # Seconds
+MEM_CACHE_SIZE = 128  # Search terms
+_MEM_CACHE: OrderedDict[str, tuple[float, datetime, list]] = OrderedDict()
+
+# Scrapes currently in progress: search term -> future with its products.
+# concurrent.futures futures can be awaited from any event loop.
+_INFLIGHT: dict[str, concurrent.futures.Future] = {}
+
+# Patterns used while parsing product cards
+_UNIT_RE = re.compile(r'(?P<num>\d+)\s*(?P<unit>[gk]|kg|gram|stuk)(?:[^a-z]|$)')
+_UNIT_TABLE = {'g': 'g', 'gram': 'g', 'k': 'kg', 'kg': 'kg', 'stuk': 'stuk'}
+_PID_RE = re.compile(r'/product/(\d+)/?')
+
+# Numbers debug HTML files; seeded from the debug dir on first use
+_debug_counter = None
+
+# Browser settings
+BROWSER_MAX_PAGES = 5  # Pages the shared browser may have open at once
+HTTP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Shared HTTP client for pages that don't need a browser; lives on the scrape loop
+_http_client = None
+
+# Shared browser session, launched on first use and reused across scrapes.
+# Like the HTTP client, it lives on the shared scrape loop.
+_browser_ctx = None
+_browser_lock = None
 
 def get_cache_file(search_term: str) -> Path:
     """Get the cache file path for a search term"""
     CACHE_DIR.mkdir(exist_ok=True)
-    return CACHE_DIR / f"ah_{search_term.lower().replace(' ', '_')}_cache.json"
+    return CACHE_DIR / f"ah_{search_term.lower().replace(' ', '_')}_cache.json.gz"
 
-def should_update_cache(cache_file: Path) -> bool:
-    """Check if the cache should be updated"""
-    if not cache_file.exists():
-        return True
-        
+@lru_cache(maxsize=4096)
+def _cache_duration(cache_key: str) -> timedelta:
+    """Get the cache duration for a cache key, with a variance that is stable per key"""
+    # crc32 instead of hash() so the variance is the same in every process
+    variance_seconds = int(CACHE_DURATION_VARIANCE.total_seconds())
+    variance = zlib.crc32(cache_key.encode()) % (2 * variance_seconds) - variance_seconds
+    return CACHE_DURATION + timedelta(seconds=variance)
+
+def is_cache_expired(cache_time: datetime, cache_key: str) -> bool:
+    """Check if cache data for the given key written at the given time has expired"""
+    return datetime.now() - cache_time > _cache_duration(cache_key)
+
+def _mem_cache_get(search_term: str, cache_key: str) -> list:
+    """Get products from the in-memory cache if neither the entry nor the cache data has expired"""
+    key = search_term.lower()
+    entry = _MEM_CACHE.get(key)
+    if entry is None:
+        return None
+    loaded_at, cache_time, products = entry
+    if time.monotonic() - loaded_at > MEM_CACHE_TTL or is_cache_expired(cache_time, cache_key):
+        del _MEM_CACHE[key]
+        return None
+    _MEM_CACHE.move_to_end(key)
+    return products
+
+def _mem_cache_put(search_term: str, cache_time: datetime, products: list) -> None:
+    """Store products in the in-memory cache, evicting the least recently used term"""
+    key = search_term.lower()
+    _MEM_CACHE[key] = (time.monotonic(), cache_time, products)
+    _MEM_CACHE.move_to_end(key)
+    if len(_MEM_CACHE) > MEM_CACHE_SIZE:
+        _MEM_CACHE.popitem(last=False)
+
+def _read_cache(cache_file: Path) -> tuple[datetime, list]:
+    """Read a cache file in one pass, returning its timestamp and products"""
+    with gzip.open(cache_file, 'rb') as f:
+        cache_data = orjson.loads(f.read())
+    cache_time = datetime.fromisoformat(cache_data.get('timestamp', '2000-01-01'))
+    return cache_time, cache_data.get('products', [])
+
+def _cache_file_time(cache_file: Path) -> datetime:
+    """Get when a cache file was written from its mtime, or None if it doesn't exist"""
     try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-            
-        # Get the cache timestamp
-        cache_time = datetime.fromisoformat(cache_data.get('timestamp', '2000-01-01'))
-        
-        # Add random variance to cache duration
-        variance = random.uniform(-CACHE_DURATION_VARIANCE.total_seconds(), 
-                                CACHE_DURATION_VARIANCE.total_seconds())
-        actual_duration = CACHE_DURATION + timedelta(seconds=variance)
-        
-        # Check if cache has expired
-        return datetime.now() - cache_time > actual_duration
-        
-    except Exception as e:
-        logger.error(f"Error reading cache: {str(e)}")
-        return True
+        return datetime.fromtimestamp(cache_file.stat().st_mtime)
+    except FileNotFoundError:
+        return None
 
-def save_to_cache(search_term: str, products: list) -> None:
-    """Save products to cache"""
+def _write_cache(cache_file: Path, cache_data: dict) -> None:
+    """Compress cache data and write it to its cache file"""
+    write_cache_file(cache_file, gzip.compress(orjson.dumps(cache_data), compresslevel=1))
+
+async def save_to_cache(search_term: str, products: list) -> None:
+    """Save products to cache, compressing and writing the file off the scrape loop"""
     cache_file = get_cache_file(search_term)
+    cache_time = datetime.now()
     cache_data = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': cache_time.isoformat(),
         'products': products
     }
     
     try:
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        await asyncio.to_thread(_write_cache, cache_file, cache_data)
+        _mem_cache_put(search_term, cache_time, products)
         logger.info(f"Saved {len(products)} products to cache for '{search_term}'")
     except Exception as e:
+        _MEM_CACHE.pop(search_term.lower(), None)
         logger.error(f"Error saving to cache: {str(e)}")
 
-def load_from_cache(search_term: str) -> list:
-    """Load products from cache"""
+def iter_cached_products(search_term: str):
+    """
+    Yield cached products for a search term one at a time, without parsing
+    the whole cache file up front. Freshness is not checked.
+    """
     cache_file = get_cache_file(search_term)
+    if not cache_file.exists():
+        return
     
     try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-        products = cache_data.get('products', [])
-        logger.info(f"Loaded {len(products)} products from cache for '{search_term}'")
-        return products
+        with gzip.open(cache_file, 'rb') as f:
+            yield from ijson.items(f, 'products.item', use_float=True)
+    except (OSError, ijson.JSONError) as e:
+        logger.error(f"Error streaming from cache: {str(e)}")
+
+def _load_fresh_cache(cache_file: Path) -> tuple[datetime, list]:
+    """Read a cache file if it exists and hasn't expired, returning its mtime and products, or None"""
+    # Check the file's age before reading it
+    cache_time = _cache_file_time(cache_file)
+    if cache_time is None or is_cache_expired(cache_time, cache_file.name):
+        return None
+    _, products = _read_cache(cache_file)
+    return cache_time, products
+
+async def get_cached_products(search_term: str) -> tuple[list, bool]:
+    """
+    Get cached products for a search term, checking memory before disk.
+    Returns (products, is_fresh); expired files aren't read, so products is
+    None unless the cache is fresh. The file is read off the scrape loop,
+    which the Jumbo and Plus crawls share.
+    """
+    cache_file = get_cache_file(search_term)
+    products = _mem_cache_get(search_term, cache_file.name)
+    if products is not None:
+        return products, True
+    
+    try:
+        cached = await asyncio.to_thread(_load_fresh_cache, cache_file)
     except Exception as e:
         logger.error(f"Error loading from cache: {str(e)}")
-        return None
+        return None, False
+    if cached is None:
+        return None, False
+    
+    cache_time, products = cached
+    _mem_cache_put(search_term, cache_time, products)
+    logger.info(f"Loaded {len(products)} products from cache for '{search_term}'")
+    return products, True
 
 def save_debug_html(html_content, search_term):
     """Save HTML content to a debug file."""
+    global _debug_counter
+    
     debug_dir = "debug"
     if not os.path.exists(debug_dir):
         os.makedirs(debug_dir)
+    if _debug_counter is None:
+        _debug_counter = itertools.count(len(os.listdir(debug_dir)))
     
-    debug_file = os.path.join(debug_dir, f"ah_search_{search_term}_{len(os.listdir(debug_dir))}.html")
+    debug_file = os.path.join(debug_dir, f"ah_search_{search_term}_{next(_debug_counter)}.html")
     with open(debug_file, 'w', encoding='utf-8') as f:
         f.write(html_content)
-    print(f"Debug HTML saved to: {debug_file}")
+    logger.info("Debug HTML saved to: %s", debug_file)
+
+def _get_http_client():
+    """Get the shared HTTP client, opening it if needed; call on the scrape loop"""
+    global _http_client
+
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            headers={'User-Agent': HTTP_USER_AGENT},
+            timeout=30,
+            follow_redirects=True
+        )
+
+    return _http_client
+
+async def _close_http_client():
+    """Close the shared HTTP client if one is open"""
+    global _http_client
+
+    if _http_client is not None:
+        client, _http_client = _http_client, None
+        await client.aclose()
+
+async def close_http_client():
+    """Close the shared HTTP client from any event loop"""
+    await run_on_scrape_loop(_close_http_client())
+
+close_at_exit(_close_http_client)
+
+async def _try_http(url):
+    """
+    Fetch a page without a browser.
+    Returns the HTML, or None if the request failed or the page has no product cards.
+    """
+    try:
+        response = await _get_http_client().get(url)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.info(f"Plain HTTP fetch failed for {url}: {str(e)}")
+        return None
+
+    if 'data-testhook="product-card"' not in response.text:
+        return None
+    return response.text
+
+async def _get_browser():
+    """Get the shared stealth browser session, launching it if needed; call on the scrape loop"""
+    global _browser_ctx, _browser_lock
+
+    if _browser_lock is None:
+        _browser_lock = asyncio.Lock()
+
+    async with _browser_lock:
+        if _browser_ctx is None:
+            session = AsyncStealthySession(
+                headless=True,
+                max_pages=BROWSER_MAX_PAGES
+            )
+            await session.start()
+            _browser_ctx = session
+            logger.info("Started shared browser session")
+
+    return _browser_ctx
+
+async def _close_browser():
+    """Close the shared browser session if one is running"""
+    global _browser_ctx
+
+    if _browser_ctx is not None:
+        session, _browser_ctx = _browser_ctx, None
+        await session.close()
+        logger.info("Closed shared browser session")
+
+async def close_browser():
+    """Close the shared browser session from any event loop"""
+    await run_on_scrape_loop(_close_browser())
+
+close_at_exit(_close_browser)
 
 async def scrape_ah_products(search_term):
     """
     Scrapes products from Albert Heijn for a given search term using Scrapling.
     Returns a list of products sorted by price.
     """
+    # The shared browser and HTTP client live on the scrape loop, so scrape there
+    return await run_on_scrape_loop(_scrape_ah_products(search_term))
+
+async def _scrape_ah_products(search_term):
+    """Scrape one search term on the scrape loop, serving it from the cache when fresh"""
     logger.info(f"Starting product search for: {search_term}")
     
     # Check cache first
-    cache_file = get_cache_file(search_term)
-    if not should_update_cache(cache_file):
-        cached_products = load_from_cache(search_term)
-        if cached_products is not None:
-            return cached_products
+    cached_products, is_fresh = await get_cached_products(search_term)
+    if is_fresh:
+        return cached_products
+    
+    # Wait for a scrape of the same term that is already running
+    future = concurrent.futures.Future()
+    inflight = _INFLIGHT.setdefault(search_term, future)
+    if inflight is not future:
+        logger.info(f"Waiting for running scrape of: {search_term}")
+        # Shield the shared future so a cancelled waiter doesn't cancel it for the others
+        return await asyncio.shield(asyncio.wrap_future(inflight))
     
     logger.info(f"Cache needs update, scraping fresh data for: {search_term}")
     
+    products = error = None
+    try:
+        products = await _scrape_fresh_products(search_term)
+        return products
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        del _INFLIGHT[search_term]
+        # Resolve the future even if this scrape was cancelled, so waiters can't hang
+        if products is not None:
+            future.set_result(products)
+        else:
+            future.set_exception(error or RuntimeError(f"Scrape of '{search_term}' was cancelled"))
+
+async def _scrape_fresh_products(search_term):
+    """Scrape the AH search results page for a search term, bypassing the cache"""
     try:
         # Navigate to search results
         url = f"https://www.ah.nl/zoeken?query={search_term}"
-        print(f"Navigating to {url}")
+        logger.debug("Navigating to %s", url)
         
-        # Use StealthyFetcher to get the page
-        page = await StealthyFetcher.async_fetch(
-            url,
-            headless=True,
-            network_idle=True,
-            wait_selector='[data-testhook="product-card"]',
-            disable_resources=True,
-            timeout=90000  # Increased timeout
-        )
+        # Try plain HTTP first and only use the browser if the products aren't in the markup
+        html = await _try_http(url)
+        if html is not None:
+            page = Selector(html, url=url)
+        else:
+            browser = await _get_browser()
+            page = await browser.fetch(
+                url,
+                network_idle=True,
+                wait_selector='[data-testhook="product-card"]',
+                disable_resources=True,
+                timeout=90000  # Increased timeout
+            )
         
-        print("Extracting product information...")
-        products = []
+        logger.debug("Extracting product information...")
         
         # Find all product cards
         product_cards = page.css('[data-testhook="product-card"]')
-        print(f"Found {len(product_cards)} product cards")
+        logger.debug("Found %d product cards", len(product_cards))
+        
+        # One slot per card; skipped cards stay None and are dropped afterwards
+        products = [None] * len(product_cards)
+        unit_search = _UNIT_RE.search
+        pid_search = _PID_RE.search
+        scraped_at = datetime.now().isoformat()
         
-        for card in product_cards:
+        for i, card in enumerate(product_cards):
             try:
+                # Index the card's testhook elements in a single walk
+                hooks = {}
+                for el in card.css('[data-testhook]'):
+                    hooks.setdefault(el.attrib['data-testhook'], el)
+                
                 # Get product name
-                name_element = card.css_first('[data-testhook="product-title-line-clamp"]')
+                name_element = hooks.get('product-title-line-clamp')
                 if not name_element:
                     continue
                 name = name_element.text.strip()
-                print(f"\nProcessing product: {name}")
+                logger.debug("Processing product: %s", name)
                 
                 # Get price
-                price_element = card.css_first('[data-testhook="price-amount"]')
+                price_element = hooks.get('price-amount')
                 if not price_element:
-                    print(f"No price found for product: {name}")
+                    logger.debug("No price found for product: %s", name)
                     continue
                 integer_part = price_element.css_first('.price-amount_integer__\\+e2XO').text
                 fractional_part = price_element.css_first('.price-amount_fractional__kjJ7u').text
-                price = float(f"{integer_part}.{fractional_part}")
+                # Pad the fraction so "1,5" is read as 150 cents, not 105
+                fractional_part = fractional_part.strip().ljust(2, '0')[:2]
+                price_cents = int(integer_part) * 100 + int(fractional_part)
+                price = price_cents / 100
                 price_display = f"€{price:.2f}"
-                print(f"Found price: {price_display}")
+                logger.debug("Found price: %s", price_display)
                 
                 # Check for bonus/promotional price
                 is_bonus = False
@@ -173,24 +407,24 @@ async def scrape_ah_products(search_term):
                             pass
                 
                 # Get unit size (e.g., "400 g", "1 kg")
-                unit_size_element = card.css_first('[data-testhook="product-unit-size"]')
+                unit_size_element = hooks.get('product-unit-size')
                 unit_size = unit_size_element.text.strip() if unit_size_element else None
                 
                 # Convert unit size to standard format if possible
                 if unit_size:
-                    match = re.search(r'(\d+)\s*([gk]|kg|gram|stuk)(?:[^a-z]|$)', unit_size.lower())
+                    match = unit_search(unit_size.lower())
                     if match:
-                        num = match.group(1)
-                        unit = match.group(2).lower()
-                        if unit in ['g', 'gram']:
-                            unit_size = f"{num}g"
-                        elif unit in ['k', 'kg']:
+                        num = match.group('num')
+                        unit = _UNIT_TABLE[match.group('unit')]
+                        if unit == 'kg':
                             unit_size = f"{int(num) * 1000}g"
-                        elif unit == 'stuk':
+                        elif unit == 'g':
+                            unit_size = f"{num}g"
+                        else:
                             unit_size = f"{num} stuk"
                 
                 # Get unit price (price per kg/liter)
-                unit_price_element = card.css_first('[data-testhook="price-amount-per-unit"]')
+                unit_price_element = hooks.get('price-amount-per-unit')
                 unit_price = None
                 unit_price_display = None
                 if unit_price_element:
@@ -203,25 +437,25 @@ async def scrape_ah_products(search_term):
                         pass
                 
                 # Get image
-                img_element = card.css_first('[data-testhook="product-image"]')
+                img_element = hooks.get('product-image')
                 if not img_element:
-                    print(f"No image found for product: {name}")
+                    logger.debug("No image found for product: %s", name)
                     continue
                 image = img_element.attrib.get('src', '')
                 if not image:
-                    print(f"No image URL found for product: {name}")
+                    logger.debug("No image URL found for product: %s", name)
                     continue
                 
                 # Get link
                 link_element = card.css_first('a[href^="/producten/product"]')
                 if not link_element:
-                    print(f"No link found for product: {name}")
+                    logger.debug("No link found for product: %s", name)
                     continue
                 link = "https://www.ah.nl" + link_element.attrib.get('href', '')
                 
                 # Get product properties (e.g., "Vega", "Biologisch")
                 properties = []
-                properties_element = card.css_first('[data-testhook="product-properties"]')
+                properties_element = hooks.get('product-properties')
                 if properties_element:
                     for prop in properties_element.css('svg'):
                         prop_title = prop.css_first('title')
@@ -230,7 +464,7 @@ async def scrape_ah_products(search_term):
                 
                 # Get nutriscore if available
                 nutriscore = None
-                nutriscore_element = card.css_first('[data-testhook="product-highlight"]')
+                nutriscore_element = hooks.get('product-highlight')
                 if nutriscore_element and 'nutriscore' in nutriscore_element.attrib.get('class', ''):
                     for class_name in nutriscore_element.attrib.get('class', '').split():
                         if 'nutriscore-' in class_name:
@@ -240,23 +474,24 @@ async def scrape_ah_products(search_term):
                 # Get product ID from URL
                 product_id = None
                 if link:
-                    id_match = re.search(r'/product/(\d+)/?', link)
+                    id_match = pid_search(link)
                     if id_match:
                         product_id = id_match.group(1)
                 
                 # Get brand (if available)
-                brand_element = card.css_first('[data-testhook="product-brand"]')
+                brand_element = hooks.get('product-brand')
                 brand = brand_element.text.strip() if brand_element else None
                 
                 # Get stock status
-                stock_element = card.css_first('[data-testhook="product-stock"]')
+                stock_element = hooks.get('product-stock')
                 stock_status = stock_element.text.strip().lower() if stock_element else 'in stock'
                 
-                products.append({
+                products[i] = {
                     'id': product_id,
                     'name': name,
                     'brand': brand,
                     'price': price,
+                    'price_cents': price_cents,
                     'price_display': price_display,
                     'is_bonus': is_bonus,
                     'original_price': original_price,
@@ -272,29 +507,68 @@ async def scrape_ah_products(search_term):
                     'nutriscore': nutriscore,
                     'stock_status': stock_status,
                     'store': 'ah',
-                    'scraped_at': datetime.now().isoformat()
-                })
+                    'scraped_at': scraped_at
+                }
                 
             except Exception as e:
-                print(f"Error processing product: {str(e)}")
+                logger.warning("Error processing product: %s", e)
                 continue
         
+        products = [p for p in products if p]
+        
         # Sort products by price
-        products.sort(key=lambda x: x['price'])
+        products.sort(key=itemgetter('price_cents'))
         
         # After successful scraping, save to cache
         if products:
-            save_to_cache(search_term, products)
+            await save_to_cache(search_term, products)
         
-        print(f"Successfully extracted {len(products)} products")
+        logger.info("Successfully extracted %d products", len(products))
         return products
         
     except Exception as e:
-        print(f"Error scraping products: {str(e)}")
+        logger.error("Error scraping products: %s", e)
         raise
 
+async def scrape_ah_products_batch(terms, max_concurrency=BROWSER_MAX_PAGES):
+    """
+    Scrapes products from Albert Heijn for several search terms concurrently.
+    Returns a dict mapping each search term to its products, or to the
+    exception raised while scraping it.
+    """
+    return await run_on_scrape_loop(_scrape_ah_products_batch(terms, max_concurrency))
+
+async def _scrape_ah_products_batch(terms, max_concurrency):
+    """Scrape several search terms on the scrape loop"""
+    results = dict.fromkeys(terms)
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def scrape_with_limit(term):
+        async with sem:
+            return await _scrape_ah_products(term)
+
+    tasks = {}
+    for term in results:
+        # Serve fresh cache hits directly so they don't take up a scrape slot
+        cached_products, is_fresh = await get_cached_products(term)
+        if is_fresh:
+            results[term] = cached_products
+            continue
+        tasks[term] = scrape_with_limit(term)
+
+    scraped = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    results.update(zip(tasks, scraped))
+    return results
+
 if __name__ == "__main__":
     # Test the scraper
-    products = asyncio.run(scrape_ah_products("kaas"))
+    async def test():
+        try:
+            return await scrape_ah_products("kaas")
+        finally:
+            await close_browser()
+            await close_http_client()
+
+    products = asyncio.run(test())
     with open('cheese_products.json', 'w', encoding='utf-8') as f:
         json.dump(products, f, ensure_ascii=False, indent=2) 
\ No newline at end of file
@@ -1,36 +1,75 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
 from ah_scraper import scrape_ah_products
 from jumbo_scraper import scrape_jumbo_products
 from plus_scraper import scrape_plus_products
-import json
+import orjson
 import os
 import asyncio
-import nest_asyncio
-from functools import partial
+from functools import lru_cache
+from operator import itemgetter
 from concurrent.futures import ThreadPoolExecutor
 import hypercorn.asyncio
 import hypercorn.config
 import re
 import logging
-from watchfiles import run_process
+import uuid
+import time
+import threading
+from collections import OrderedDict
+from flask.json.provider import DefaultJSONProvider
 
-# Enable nested async operations
-nest_asyncio.apply()
+logger = logging.getLogger(__name__)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serialises with orjson; inf/nan become null"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default), mimetype=self.mimetype)
 
 app = Flask(__name__, static_folder='static')
+app.json = OrjsonProvider(app)
+# Set SECRET_KEY when running several workers so they all accept the session cookie
+app.secret_key = os.getenv('SECRET_KEY') or os.urandom(24)
+
+# Per-session carts live in Redis when REDIS_URL is set, so any worker can serve
+# any request; otherwise they are kept in this process only
+REDIS_URL = os.getenv('REDIS_URL')
+CART_TTL = 30 * 24 * 3600  # Seconds an untouched cart is kept
+_redis = None
+if REDIS_URL:
+    import redis
+    _redis = redis.Redis.from_url(REDIS_URL)
+CART_MEMORY_SIZE = int(os.getenv('CART_MEMORY_SIZE', '1024'))  # Carts kept in this process
+_carts: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_carts_lock = threading.Lock()
+
+# Size of the event loop's default thread pool (asyncio.to_thread, WSGI requests)
+THREAD_POOL_SIZE = int(os.getenv('THREAD_POOL_SIZE', '16'))
 
-# Initialize session storage
-grocery_list = []
-selected_products = {}
+# Compiled patterns for the regex_replace template filter
+_compile_pattern = lru_cache(maxsize=128)(re.compile)
 
-# Create thread pool executor
-executor = ThreadPoolExecutor(max_workers=4)
+# Strips the euro sign and turns a decimal comma into a point in one pass
+_PRICE_TRANS = str.maketrans({'€': None, ',': '.'})
+
+def _parse_price(price):
+    """Parse a price like "€1,99" or a number to a float"""
+    if type(price) is float:
+        return price
+    if isinstance(price, str):
+        return float(price.translate(_PRICE_TRANS))
+    return float(price)
 
 # Helper functions for Jinja2 templates
 def format_price(price):
     try:
-        if isinstance(price, str):
-            price = float(price.replace('€', '').replace(',', '.'))
+        price = _parse_price(price)
         return "{:.2f}".format(price).replace('.', ',')
     except (ValueError, TypeError):
         return "0,00"
@@ -40,45 +79,84 @@ def format_unit_size(unit_size):
     if not unit_size:
         return ''
     
-    unit_size = str(unit_size).lower().strip()
+    return _format_unit_size(unit_size if type(unit_size) is str else str(unit_size))
+
+_DIGITS = '0123456789'
+
+@lru_cache(maxsize=4096)
+def _parse_unit(unit_size):
+    """
+    Parse a lowercased unit size string in a single left-to-right scan.
+    Returns (quantity, kind) where kind is 'g', 'kg', 'stuk', 'plak' or 'unknown'
+    and quantity is expressed in that unit (0 if no amount was found).
+    """
+    # Piece and slice counts: the digits right before the word
+    for kind in ('stuk', 'plak'):
+        pos = unit_size.find(kind)
+        if pos != -1:
+            end = pos
+            while end > 0 and unit_size[end - 1] == ' ':
+                end -= 1
+            start = end
+            while start > 0 and unit_size[start - 1] in _DIGITS:
+                start -= 1
+            return (int(unit_size[start:end]) if start < end else 0), kind
     
-    # Handle piece-based items (stuks)
-    if 'stuk' in unit_size:
-        match = re.search(r'(\d+)\s*stuk', unit_size)
-        if match:
-            return f"{match.group(1)} stuks"
-        return unit_size
+    # Weights: the first number directly followed by a kg/kilo/g(ram) unit
+    n = len(unit_size)
+    i = 0
+    while i < n:
+        if unit_size[i] not in _DIGITS:
+            i += 1
+            continue
+        start = i
+        while i < n and unit_size[i] in _DIGITS:
+            i += 1
+        if i + 1 < n and unit_size[i] in '.,' and unit_size[i + 1] in _DIGITS:
+            i += 1
+            while i < n and unit_size[i] in _DIGITS:
+                i += 1
+        j = i
+        while j < n and unit_size[j] == ' ':
+            j += 1
+        if unit_size.startswith(('kg', 'kilo'), j):
+            return float(unit_size[start:i].replace(',', '.')), 'kg'
+        if unit_size.startswith('g', j):
+            return float(unit_size[start:i].replace(',', '.')), 'g'
     
-    # Handle "Per X" format
-    per_match = re.search(r'per\s+(\d+(?:[.,]\d+)?)\s*([gk]|kg|gram)', unit_size)
-    if per_match:
-        num = per_match.group(1).replace(',', '.')
-        unit = per_match.group(2).lower()
-        if unit in ['k', 'kg']:
-            return f"Per {num} kg"
-        return f"Per {num} g"
+    # Bare numbers like "410" are grams
+    if unit_size.isdecimal():
+        return float(unit_size), 'g'
     
-    # Handle kilogram units
-    if any(x in unit_size for x in ['kg', 'kilo']):
-        match = re.search(r'(\d+(?:[.,]\d+)?)\s*k(?:ilo|g)', unit_size)
-        if match:
-            return f"{match.group(1)} kg"
+    return 0, 'unknown'
+
+def _unit_grams(quantity, kind):
+    """Convert a parsed weight to grams"""
+    return quantity * 1000 if kind == 'kg' else quantity
+
+@lru_cache(maxsize=4096)
+def _format_unit_size(unit_size):
+    """Format a unit size string; cached since the same sizes repeat across products"""
+    unit_size = unit_size.lower().strip()
+    quantity, kind = _parse_unit(unit_size)
     
-    # Handle gram units
-    gram_match = re.search(r'(\d+(?:[.,]\d+)?)\s*g(?:ram)?', unit_size)
-    if gram_match:
-        grams = float(gram_match.group(1))
-        if grams >= 1000:
-            return f"{grams/1000:.1f} kg"
-        return f"{int(grams)} g"
+    # Handle piece-based items (stuks)
+    if kind == 'stuk':
+        return f"{quantity} stuks" if quantity else unit_size
     
-    # Try to extract just the number for products like "410g" without space
-    numeric_match = re.search(r'^(\d+)$', unit_size)
-    if numeric_match:
-        value = float(numeric_match.group(1))
-        if value >= 1000:
-            return f"{value/1000:.1f} kg"
-        return f"{int(value)} g"
+    if kind in ('g', 'kg') and quantity:
+        # Handle "Per X" format
+        if unit_size.startswith('per '):
+            return f"Per {quantity:g} {kind}"
+        
+        # Handle kilogram units
+        if kind == 'kg':
+            return f"{quantity:g} kg"
+        
+        # Handle gram units, including bare numbers like "410"
+        if quantity >= 1000:
+            return f"{quantity/1000:.1f} kg"
+        return f"{int(quantity)} g"
     
     return unit_size
 
@@ -87,115 +165,137 @@ def format_price_per_unit(price, unit_size):
     if not price or not unit_size:
         return ''
     
+    return _format_price_per_unit(price, unit_size if type(unit_size) is str else str(unit_size))
+
+@lru_cache(maxsize=4096)
+def _format_price_per_unit(price, unit_size):
+    """Format price per unit for a price and unit size string; cached by both"""
     try:
         # Parse price consistently
-        if isinstance(price, str):
-            price = float(price.replace('€', '').replace(',', '.'))
-        
-        unit_size = str(unit_size).lower().strip()
+        price = _parse_price(price)
         
-        # Handle piece-based items (stuks)
-        if 'stuk' in unit_size:
-            match = re.search(r'(\d+)\s*stuk', unit_size)
-            if match:
-                pieces = int(match.group(1))
-                if pieces > 0:
-                    price_per_piece = price / pieces
-                    return f"€{format_price(price_per_piece)}/stuk"
-            return f"€{format_price(price)}/stuk"
+        quantity, kind = _parse_unit(unit_size.lower().strip())
+        unit_price = _unit_price(price, quantity, kind)
         
-        # Handle slices (plakken)
-        if 'plak' in unit_size:
-            match = re.search(r'(\d+)\s*plak', unit_size)
-            if match:
-                slices = int(match.group(1))
-                if slices > 0:
-                    price_per_slice = price / slices
-                    return f"€{format_price(price_per_slice)}/plak"
-            return f"€{format_price(price)}/plak"
+        # Handle piece-based items (stuks) and slices (plakken)
+        if kind in ('stuk', 'plak'):
+            return f"€{format_price(unit_price)}/{kind}"
         
-        # For weight-based items
-        grams = 0
-        
-        # First try to get weight from "Per X g/kg" format
-        per_match = re.search(r'per\s+(\d+(?:[.,]\d+)?)\s*([gk]|kg|gram)', unit_size)
-        if per_match:
-            num = per_match.group(1).replace(',', '.')
-            unit = per_match.group(2).lower()
-            if unit in ['k', 'kg']:
-                grams = float(num) * 1000
-            else:
-                grams = float(num)
-        else:
-            # Handle kg/kilo
-            if any(x in unit_size for x in ['kg', 'kilo']):
-                match = re.search(r'(\d+(?:[.,]\d+)?)\s*k(?:ilo|g)', unit_size)
-                if match:
-                    kg = float(match.group(1).replace(',', '.'))
-                    grams = kg * 1000
-                    
-            # Handle grams
-            elif any(x in unit_size for x in ['g', 'gram']):
-                match = re.search(r'(\d+(?:[.,]\d+)?)\s*g(?:ram)?', unit_size)
-                if match:
-                    grams = float(match.group(1).replace(',', '.'))
-                    
-            # Handle numeric-only values (assume grams)
-            else:
-                numeric_match = re.search(r'^(\d+)$', unit_size)
-                if numeric_match:
-                    grams = float(numeric_match.group(1))
-        
-        # Calculate and format price per kg
-        if grams > 0:
-            price_per_kg = (price / grams) * 1000
-            return f"€{format_price(price_per_kg)}/kg"
+        # Price per kg for weight-based items
+        if _unit_grams(quantity, kind) > 0:
+            return f"€{format_price(unit_price)}/kg"
         
         return f"€{format_price(price)}"
         
     except Exception as e:
-        print(f"Error formatting price per unit: {str(e)}")
+        logger.warning("Error formatting price per unit: %s", e)
         return f"€{format_price(price)}"
 
+def format_product(product):
+    """Format a product's price, unit size and price per unit in one filter call"""
+    price = product.get('price')
+    unit_size = product.get('unit_size')
+    return {
+        'price': format_price(price),
+        'unit': format_unit_size(unit_size),
+        'ppu': format_price_per_unit(price, unit_size)
+    }
+
 # Register template functions
 app.jinja_env.filters['formatPrice'] = format_price
 app.jinja_env.filters['formatUnitSize'] = format_unit_size
 app.jinja_env.filters['formatPricePerUnit'] = format_price_per_unit
+app.jinja_env.filters['formatProduct'] = format_product
 
-# Helper function to run sync function in executor
-def run_in_executor(func, *args):
-    return executor.submit(func, *args).result()
+def _load_cart():
+    """
+    Get the current session's grocery list (items as keys, in insertion order) and selected products.
+    Sessions without a saved cart get a fresh empty one that is only stored by _save_cart.
+    """
+    sid = session.get('sid')
+    if sid is None:
+        return {'grocery_list': {}, 'selected_products': {}}
+    
+    if _redis is None:
+        with _carts_lock:
+            entry = _carts.get(sid)
+            if entry is None or time.monotonic() - entry[0] > CART_TTL:
+                _carts.pop(sid, None)
+                return {'grocery_list': {}, 'selected_products': {}}
+            _carts.move_to_end(sid)
+            return entry[1]
+    
+    data = _redis.get(f"cart:{sid}")
+    if data is None:
+        return {'grocery_list': {}, 'selected_products': {}}
+    cart = orjson.loads(data)
+    cart['grocery_list'] = dict.fromkeys(cart['grocery_list'])
+    return cart
+
+def _save_cart(cart):
+    """Store the current session's cart, dropping it once it is empty"""
+    sid = session.setdefault('sid', uuid.uuid4().hex)
+    empty = not cart['grocery_list'] and not cart['selected_products']
+    
+    if _redis is None:
+        # Least recently used carts are evicted once the process holds CART_MEMORY_SIZE
+        with _carts_lock:
+            if empty:
+                _carts.pop(sid, None)
+                return
+            _carts[sid] = (time.monotonic(), cart)
+            _carts.move_to_end(sid)
+            if len(_carts) > CART_MEMORY_SIZE:
+                _carts.popitem(last=False)
+        return
+    
+    if empty:
+        _redis.delete(f"cart:{sid}")
+        return
+    data = orjson.dumps({
+        'grocery_list': list(cart['grocery_list']),
+        'selected_products': cart['selected_products']
+    })
+    _redis.set(f"cart:{sid}", data, ex=CART_TTL)
 
 @app.route('/')
 def index():
-    return render_template('index.html', grocery_list=grocery_list, selected_products=selected_products)
+    cart = _load_cart()
+    return render_template('index.html', grocery_list=cart['grocery_list'], selected_products=cart['selected_products'])
 
 @app.route('/add_item', methods=['POST'])
 def add_item():
     item = request.form.get('item')
+    cart = _load_cart()
+    grocery_list = cart['grocery_list']
     if item and item not in grocery_list:
-        grocery_list.append(item)
-    return jsonify({'success': True, 'grocery_list': grocery_list})
+        grocery_list[item] = None
+        _save_cart(cart)
+    return jsonify({'success': True, 'grocery_list': list(grocery_list)})
 
 @app.route('/remove_item', methods=['POST'])
 def remove_item():
     item = request.form.get('item')
+    cart = _load_cart()
+    grocery_list = cart['grocery_list']
     if item in grocery_list:
-        grocery_list.remove(item)
-        if item in selected_products:
-            del selected_products[item]
-    return jsonify({'success': True, 'grocery_list': grocery_list})
+        del grocery_list[item]
+        cart['selected_products'].pop(item, None)
+        _save_cart(cart)
+    return jsonify({'success': True, 'grocery_list': list(grocery_list)})
 
 @app.route('/clear_list', methods=['POST'])
 def clear_list():
-    grocery_list.clear()
-    selected_products.clear()
+    cart = _load_cart()
+    cart['grocery_list'].clear()
+    cart['selected_products'].clear()
+    _save_cart(cart)
     return jsonify({'success': True})
 
 async def search_both_stores(item):
     """Run both scrapers concurrently"""
     # Create tasks for both scrapers
-    ah_task = run_sync_in_executor(scrape_ah_products, item)
+    ah_task = scrape_ah_products(item)
     jumbo_task = scrape_jumbo_products(item)
     
     # Run both tasks concurrently
@@ -208,20 +308,54 @@ async def search_both_stores(item):
     
     # Handle AH results
     if isinstance(ah_products, Exception):
-        print(f"Error searching AH products: {str(ah_products)}")
+        logger.warning("Error searching AH products: %s", ah_products)
     elif ah_products:
-        print(f"Found {len(ah_products)} AH products")
+        logger.info("Found %d AH products", len(ah_products))
         products.extend(ah_products)
     
     # Handle Jumbo results
     if isinstance(jumbo_products, Exception):
-        print(f"Error searching Jumbo products: {str(jumbo_products)}")
+        logger.warning("Error searching Jumbo products: %s", jumbo_products)
     elif jumbo_products:
-        print(f"Found {len(jumbo_products)} Jumbo products")
+        logger.info("Found %d Jumbo products", len(jumbo_products))
         products.extend(jumbo_products)
     
     return products
 
+def _annotate_unit(product):
+    """
+    Parse a product's price and unit size once.
+    Returns a shallow copy of the product, since the scrapers' memory caches hand
+    the same dicts to every request, along with the parsed (price, quantity, kind).
+    In the copy a parseable price is normalised to a float and the unit size to a
+    str, so the formatters get well-typed values. Weights are normalised to grams,
+    so kind is 'g', 'stuk', 'plak' or 'unknown'.
+    """
+    product = dict(product)
+    try:
+        product['price'] = price = _parse_price(product.get('price'))
+    except (ValueError, TypeError):
+        price = None
+    unit_size = product.get('unit_size')
+    if not isinstance(unit_size, str):
+        product['unit_size'] = unit_size = '' if unit_size is None else str(unit_size)
+    quantity, kind = _parse_unit(unit_size.lower().strip())
+    if kind == 'kg':
+        quantity, kind = _unit_grams(quantity, kind), 'g'
+    return product, (price, quantity, kind)
+
+def _unit_price(price, quantity, kind):
+    """Price per piece/slice, per kg for weights, or the plain price if the size is unknown"""
+    if kind in ('stuk', 'plak'):
+        return price / quantity if quantity > 0 else price
+    
+    # For weight-based items
+    grams = _unit_grams(quantity, kind)
+    if grams > 0:
+        return (price / grams) * 1000  # Convert to price per kg
+    
+    return price
+
 def calculate_price_per_unit(product):
     """Calculate price per unit (kg or piece) for sorting"""
     try:
@@ -229,54 +363,110 @@ def calculate_price_per_unit(product):
         if product.get('price_per_unit_value') is not None:
             return float(product['price_per_unit_value'])
         
+        return _calc_ppu(product['price'], str(product.get('unit_size', '')))
+    
+    except (ValueError, TypeError) as e:
+        logger.warning("Error calculating price per unit: %s", e)
+        return float('inf')  # Return infinity for invalid calculations
+
+def _resolve_ppu(product, price, quantity, kind):
+    """Return a parsed product's price per unit, preferring the scraper's own value"""
+    try:
+        ppu_value = product.get('price_per_unit_value')
+        if ppu_value is not None:
+            return float(ppu_value)
+        if price is None:
+            return float('inf')  # No usable price to compare on
+        return _unit_price(price, quantity, kind)
+    
+    except (ValueError, TypeError) as e:
+        logger.warning("Error calculating price per unit: %s", e)
+        return float('inf')  # Return infinity for invalid calculations
+
+@lru_cache(maxsize=4096)
+def _calc_ppu(price, unit_size):
+    """Calculate price per unit from a price and unit size string; cached by both"""
+    try:
         # Get base price
-        price = float(str(product['price']).replace('€', '').replace(',', '.'))
-        unit_size = str(product.get('unit_size', '')).lower().strip()
-        
-        # For piece-based items (stuks)
-        if 'stuk' in unit_size:
-            match = re.search(r'(\d+)\s*stuk', unit_size)
-            if match:
-                pieces = int(match.group(1))
-                return price / pieces if pieces > 0 else price
-            return price
-        
-        # For slice-based items (plakken)
-        if 'plak' in unit_size:
-            match = re.search(r'(\d+)\s*plak', unit_size)
-            if match:
-                slices = int(match.group(1))
-                return price / slices if slices > 0 else price
-            return price
-        
-        # For weight-based items
-        grams = 0
-        
-        # Handle kg/kilo
-        if 'kg' in unit_size or 'kilo' in unit_size:
-            match = re.search(r'(\d+(?:[.,]\d+)?)\s*k(?:ilo|g)', unit_size)
-            if match:
-                grams = float(match.group(1).replace(',', '.')) * 1000
-        
-        # Handle grams
-        elif 'g' in unit_size or 'gram' in unit_size:
-            match = re.search(r'(\d+(?:[.,]\d+)?)\s*g(?:ram)?', unit_size)
-            if match:
-                grams = float(match.group(1).replace(',', '.'))
-        
-        # Handle numeric-only values (assume grams)
-        elif unit_size.replace(' ', '').isdigit():
-            grams = float(unit_size)
-        
-        if grams > 0:
-            return (price / grams) * 1000  # Convert to price per kg
-        
-        return price
+        price = _parse_price(price)
+        return _unit_price(price, *_parse_unit(unit_size.lower().strip()))
             
     except (ValueError, TypeError, ZeroDivisionError) as e:
-        print(f"Error calculating price per unit: {e}")
+        logger.warning("Error calculating price per unit: %s", e)
         return float('inf')  # Return infinity for invalid calculations
 
+def _merge_results(result, products_by_key):
+    """Add one store's results to products_by_key and return the products that were new"""
+    if isinstance(result, dict):
+        result = [result]
+    elif not isinstance(result, list):
+        return []
+    
+    new_products = []
+    for product in result:
+        if isinstance(product, dict):
+            key = (product.get('store'), product.get('name'))
+            if key not in products_by_key:
+                products_by_key[key] = product
+                new_products.append(product)
+    return new_products
+
+def _rank_products(products, sort_by):
+    """Return annotated copies of the products with their price per unit, sorted by sort_by"""
+    ranked = []
+    for product in products:
+        product, (price, quantity, kind) = _annotate_unit(product)
+        product['price_per_unit'] = _resolve_ppu(product, price, quantity, kind)
+        sort_value = price if sort_by == 'price' else product['price_per_unit']
+        ranked.append((float('inf') if sort_value is None else sort_value, product))
+    
+    # Sort products based on sort_by parameter, on the keys alone
+    if sort_by in ('price_per_unit', 'price'):
+        ranked.sort(key=itemgetter(0))
+    return [product for _, product in ranked]
+
+async def _scrape_store(scrape):
+    """Await one store's scrape, returning its exception so sibling stores keep running"""
+    try:
+        return await scrape
+    except Exception as e:
+        return e
+
+async def _results_as_completed(tasks):
+    """Yield each store's result (or exception) in the order the stores finish"""
+    for next_done in asyncio.as_completed(tasks):
+        try:
+            yield await next_done
+        except Exception as e:
+            yield e
+
+def _stream_products(tasks, sort_by):
+    """Yield one NDJSON line of new, ranked products per store as soon as it finishes"""
+    loop = asyncio.new_event_loop()
+    results = _results_as_completed(tasks)
+    products_by_key = {}
+    try:
+        while True:
+            try:
+                result = loop.run_until_complete(results.__anext__())
+            except StopAsyncIteration:
+                break
+            if isinstance(result, Exception):
+                logger.warning("Error searching products: %s", result)
+                continue
+            
+            products = _rank_products(_merge_results(result, products_by_key), sort_by)
+            yield orjson.dumps({'products': products, 'count': len(products)}, option=orjson.OPT_APPEND_NEWLINE)
+    finally:
+        # Cancel scrapes still running if the client went away
+        loop.run_until_complete(results.aclose())
+        pending = asyncio.all_tasks(loop)
+        if pending:
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+
 @app.route('/search_products', methods=['POST'])
 async def search_products():
     """Search for products in selected stores"""
@@ -295,49 +485,26 @@ async def search_products():
         if 'plus' in selected_stores:
             tasks.append(scrape_plus_products(search_term))
         
-        # Run all tasks concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Stream each store's products as NDJSON as soon as that store finishes
+        if data.get('stream'):
+            return Response(stream_with_context(_stream_products(tasks, sort_by)),
+                            mimetype='application/x-ndjson')
+        
+        # Run all tasks concurrently; each store's failure is caught on its own
+        async with asyncio.TaskGroup() as tg:
+            store_tasks = [tg.create_task(_scrape_store(task)) for task in tasks]
+        results = [task.result() for task in store_tasks]
         
-        # Combine and process results
-        products = []
-        seen_products = set()  # Track unique products by store and name
+        # Combine and process results, keeping the first product per store and name
+        products_by_key = {}
         
         for result in results:
             if isinstance(result, Exception):
-                print(f"Error searching products: {str(result)}")
+                logger.warning("Error searching products: %s", result)
                 continue
-            elif isinstance(result, list):
-                for product in result:
-                    if not isinstance(product, dict):
-                        continue
-                    # Create a unique key for each product based on store and name
-                    product_key = f"{product.get('store')}_{product.get('name')}"
-                    if product_key not in seen_products:
-                        seen_products.add(product_key)
-                        products.append(product)
-            elif result and isinstance(result, dict):
-                product_key = f"{result.get('store')}_{result.get('name')}"
-                if product_key not in seen_products:
-                    seen_products.add(product_key)
-                    products.append(result)
+            _merge_results(result, products_by_key)
         
-        # Calculate price per unit for all products
-        for product in products:
-            try:
-                # First try to use price_per_unit_value if available
-                if product.get('price_per_unit_value') is not None:
-                    product['price_per_unit'] = float(product['price_per_unit_value'])
-                else:
-                    product['price_per_unit'] = calculate_price_per_unit(product)
-            except Exception as e:
-                print(f"Error calculating price per unit: {str(e)}")
-                product['price_per_unit'] = float('inf')
-        
-        # Sort products based on sort_by parameter
-        if sort_by == 'price_per_unit':
-            products.sort(key=lambda x: x.get('price_per_unit', float('inf')))
-        elif sort_by == 'price':
-            products.sort(key=lambda x: float(str(x.get('price', '0')).replace('€', '').replace(',', '.')))
+        products = _rank_products(products_by_key.values(), sort_by)
         
         if not products:
             return jsonify({
@@ -352,7 +519,7 @@ async def search_products():
         })
         
     except Exception as e:
-        print(f"Error in search_products: {str(e)}")
+        logger.exception("Error in search_products: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/select_product', methods=['POST'])
@@ -366,11 +533,13 @@ def select_product():
         if compared_with:
             # Store both the selected product and its comparison
             product['comparedWith'] = compared_with
-        selected_products[item] = product
+        cart = _load_cart()
+        cart['selected_products'][item] = product
+        _save_cart(cart)
         return jsonify({
             'success': True, 
-            'selected_products': selected_products,
-            'grocery_list': grocery_list
+            'selected_products': cart['selected_products'],
+            'grocery_list': list(cart['grocery_list'])
         })
     return jsonify({'success': False, 'error': 'Invalid data'})
 
@@ -378,26 +547,38 @@ def select_product():
 def delete_product():
     data = request.json
     item = data.get('item')
+    cart = _load_cart()
+    selected_products = cart['selected_products']
     
     if item and item in selected_products:
         del selected_products[item]
+        _save_cart(cart)
         return jsonify({'success': True, 'selected_products': selected_products})
     return jsonify({'success': False, 'error': 'Product not found'})
 
 @app.template_filter('regex_replace')
 def regex_replace(s, find, replace):
     """Perform a regex substitution on a string."""
-    return re.sub(find, replace, str(s))
+    return _compile_pattern(find).sub(replace, str(s))
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    
     # Enable debug mode in Flask
     app.debug = True
     
     # Create Hypercorn config
     config = hypercorn.config.Config()
     config.bind = ["127.0.0.1:5000"]
+    # Hypercorn's reloader watches src through watchfiles; production deployments
+    # must set use_reloader = False
     config.use_reloader = True
     config.reload_dirs = ["src"]
     
+    async def serve():
+        # Larger default executor for to_thread calls and Hypercorn's WSGI workers
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE))
+        await hypercorn.asyncio.serve(app, config)
+    
     # Run with Hypercorn
-    asyncio.run(hypercorn.asyncio.serve(app, config)) 
\ No newline at end of file
+    asyncio.run(serve()) 
\ No newline at end of file
@@ -0,0 +1,15 @@
+import os
+import tempfile
+from pathlib import Path
+
+def write_cache_file(cache_file: Path, data: bytes) -> None:
+    """Write cache data to a temp file and swap it in, so the mtime only moves on a complete write"""
+    # A temp file of its own per write, since saves of the same term can run at once
+    fd, tmp_name = tempfile.mkstemp(dir=cache_file.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_name, cache_file)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
@@ -1,13 +1,20 @@
 import asyncio
-import json
+import orjson
+import time
 from pathlib import Path
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 import sys
+import types
 import logging
 import re
 from datetime import datetime, timedelta
-import random
+import zlib
+from functools import lru_cache
+from collections import OrderedDict
+from operator import itemgetter
+from scrape_loop import run_on_scrape_loop, close_at_exit
+from cache_io import write_cache_file
 
 # Configure logging
 logging.basicConfig(
@@ -16,42 +23,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _use_orjson_in_crawl4ai() -> None:
+    """Have crawl4ai serialise extracted_content with orjson instead of stdlib json"""
+    try:
+        import crawl4ai.async_webcrawler as webcrawler
+        # Patch only the crawler module's json reference, not the json module itself
+        patched_json = types.SimpleNamespace(**vars(webcrawler.json))
+        patched_json.dumps = lambda obj, default=None, **kwargs: orjson.dumps(
+            obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+        webcrawler.json = patched_json
+    except (ImportError, AttributeError) as e:
+        logger.warning("Keeping crawl4ai's json serialiser: %s", e)
+
+_use_orjson_in_crawl4ai()
+
 # Cache settings
 CACHE_DIR = Path("cache")
 CACHE_DURATION = timedelta(hours=12)  # Base cache duration
-CACHE_DURATION_VARIANCE = timedelta(hours=4)  # Random variance to spread updates
+CACHE_DURATION_VARIANCE = timedelta(hours=4)  # Per-term variance to spread updates
+
+# In-process LRU of parsed products per search term: term -> (loaded_at, products)
+MEMORY_CACHE_TTL = 60  # Seconds
+MEMORY_CACHE_SIZE = 128  # Search terms
+_MEMORY_CACHE: OrderedDict[str, tuple[float, list]] = OrderedDict()
+
+# Price patterns, e.g. "€ 2,19" and "€ 2,19 per stuk"
+_PRICE_RE = re.compile(r'€\s*(\d+)[,\.]?(\d{0,2})')
+_UNIT_PRICE_RE = re.compile(r'€\s*(\d+)[,\.]?(\d{0,2})\s+per\s+(\w+)')
+
+def _match_cents(match) -> int:
+    """Convert the euros and optional cents groups of a price match to integer cents"""
+    euros, cents = match.group(1), match.group(2)
+    return int(euros) * 100 + (int(cents) * 10 if len(cents) == 1 else int(cents or 0))
+
+# Unit size pattern, one named group per unit: "6 stuks", "10 plakken",
+# "1,5 kg"/"1 kilo", "400 g"/"400gram"
+_UNIT_SIZE_RE = re.compile(
+    r'(?P<stuk>\d+)\s*stuks?\b'
+    r'|(?P<plak>\d+)\s*plakk?(?:en)?\b'
+    r'|(?P<kg>\d+(?:[.,]\d+)?)\s*k(?:ilo|g)\b'
+    r'|(?P<g>\d+(?:[.,]\d+)?)\s*g(?:ram)?\b',
+    re.IGNORECASE
+)
+
+def _memory_cache_get(search_term: str) -> list:
+    """Get products from the in-process cache if they are still fresh"""
+    key = search_term.lower()
+    entry = _MEMORY_CACHE.get(key)
+    if entry is None:
+        return None
+    loaded_at, products = entry
+    if time.monotonic() - loaded_at > MEMORY_CACHE_TTL:
+        del _MEMORY_CACHE[key]
+        return None
+    _MEMORY_CACHE.move_to_end(key)
+    return products
+
+def _memory_cache_put(search_term: str, products: list) -> None:
+    """Store products in the in-process cache, evicting the least recently used term"""
+    key = search_term.lower()
+    _MEMORY_CACHE[key] = (time.monotonic(), products)
+    _MEMORY_CACHE.move_to_end(key)
+    if len(_MEMORY_CACHE) > MEMORY_CACHE_SIZE:
+        _MEMORY_CACHE.popitem(last=False)
 
 def get_cache_file(search_term: str) -> Path:
     """Get the cache file path for a search term"""
     CACHE_DIR.mkdir(exist_ok=True)
     return CACHE_DIR / f"jumbo_{search_term.lower().replace(' ', '_')}_cache.json"
 
-def should_update_cache(cache_file: Path) -> bool:
-    """Check if the cache should be updated"""
-    if not cache_file.exists():
-        return True
-        
+@lru_cache(maxsize=4096)
+def _cache_duration(cache_key: str) -> float:
+    """Get the cache duration in seconds for a cache key, with a variance that is stable per key"""
+    # crc32 instead of hash() so the variance is the same in every process
+    variance_seconds = int(CACHE_DURATION_VARIANCE.total_seconds())
+    variance = zlib.crc32(cache_key.encode()) % (2 * variance_seconds) - variance_seconds
+    return CACHE_DURATION.total_seconds() + variance
+
+async def should_update_cache(cache_file: Path) -> bool:
+    """Check if the cache should be updated, based on the cache file's mtime"""
     try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-            
-        # Get the cache timestamp
-        cache_time = datetime.fromisoformat(cache_data.get('timestamp', '2000-01-01'))
-        
-        # Add random variance to cache duration
-        variance = random.uniform(-CACHE_DURATION_VARIANCE.total_seconds(), 
-                                CACHE_DURATION_VARIANCE.total_seconds())
-        actual_duration = CACHE_DURATION + timedelta(seconds=variance)
-        
-        # Check if cache has expired
-        return datetime.now() - cache_time > actual_duration
-        
-    except Exception as e:
-        logger.error(f"Error reading cache: {str(e)}")
+        # stat() off the event loop too, like the cache reads and writes
+        stat = await asyncio.to_thread(cache_file.stat)
+    except FileNotFoundError:
         return True
+    age = time.time() - stat.st_mtime
+    
+    # Check if cache has expired
+    return age > _cache_duration(cache_file.name)
 
-def save_to_cache(search_term: str, products: list) -> None:
-    """Save products to cache"""
+async def save_to_cache(search_term: str, products: list) -> None:
+    """Save products to cache, writing the file off the event loop"""
     cache_file = get_cache_file(search_term)
     cache_data = {
         'timestamp': datetime.now().isoformat(),
@@ -59,308 +121,398 @@ def save_to_cache(search_term: str, products: list) -> None:
     }
     
     try:
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        logger.info(f"Saved {len(products)} products to cache for '{search_term}'")
+        data = orjson.dumps(cache_data, option=orjson.OPT_INDENT_2)
+        await asyncio.to_thread(write_cache_file, cache_file, data)
+        _memory_cache_put(search_term, products)
+        logger.info("Saved %d products to cache for '%s'", len(products), search_term)
     except Exception as e:
-        logger.error(f"Error saving to cache: {str(e)}")
+        logger.error("Error saving to cache: %s", e)
 
-def load_from_cache(search_term: str) -> list:
-    """Load products from cache"""
+async def load_from_cache(search_term: str) -> list:
+    """Load products from cache, reading the file off the event loop"""
     cache_file = get_cache_file(search_term)
     
     try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
+        cache_data = orjson.loads(await asyncio.to_thread(cache_file.read_bytes))
         products = cache_data.get('products', [])
-        logger.info(f"Loaded {len(products)} products from cache for '{search_term}'")
+        logger.info("Loaded %d products from cache for '%s'", len(products), search_term)
         return products
     except Exception as e:
-        logger.error(f"Error loading from cache: {str(e)}")
+        logger.error("Error loading from cache: %s", e)
         return None
 
-# Schema for product extraction
-PRODUCT_SCHEMA = {
-    "type": "array",
-    "baseSelector": "article.product-container",
-    "fields": [
-        {
-            "name": "name",
-            "selector": ".title-link",
-            "type": "text"
-        },
-        {
-            "name": "image",
-            "selector": ".product-image img",
-            "type": "attribute",
-            "attribute": "src"
-        },
-        {
-            "name": "link",
-            "selector": "a.link",
-            "type": "attribute",
-            "attribute": "href",
-            "transform": "return value.startsWith('http') ? value : `https://www.jumbo.com${value}`;"
-        },
-        {
-            "name": "price",
-            "selector": ".current-price",
-            "type": "text",
-            "transform": "const match = value.match(/€\\s*(\\d+)[,\\.]?(\\d{0,2})/); if (!match) return ''; const euros = match[1]; const cents = match[2] || '00'; return `€${euros}.${cents.padEnd(2, '0')}`;"
-        },
-        {
-            "name": "original_price",
-            "selector": ".old-price",
-            "type": "text",
-            "transform": "const match = value?.match(/€\\s*(\\d+)[,\\.]?(\\d{0,2})/); if (!match) return null; const euros = match[1]; const cents = match[2] || '00'; return `€${euros}.${cents.padEnd(2, '0')}`;"
-        },
-        {
-            "name": "is_sale",
-            "selector": ".promotional-price, .bonus-price",
-            "type": "exists"
-        },
-        {
-            "name": "unit_size",
-            "selector": ".title-link",
-            "type": "text",
-            "transform": "const match = value.match(/(\\d+)\\s*([gk]|kg|gram|plakken|stuk)(?:[^a-z]|$)/i); if (match) { const num = match[1]; const unit = match[2].toLowerCase(); if (unit === 'g' || unit === 'gram') return num + 'g'; if (unit === 'k' || unit === 'kg') return (num * 1000) + 'g'; if (unit === 'plakken') return num + ' plakken'; return num + ' stuk'; } else { const lowerValue = value.toLowerCase(); if (lowerValue.includes('half') || lowerValue.endsWith('-half') || lowerValue.endsWith(' half')) return '400g'; if (lowerValue.includes('heel') || lowerValue.endsWith('-heel') || lowerValue.endsWith(' heel')) return '800g'; return ''; }"
-        },
-        {
+def _price_value(item: dict) -> float:
+    """Parse the extracted price text of a product to a float, or None"""
+    price_match = _PRICE_RE.search(item.get('price') or '')
+    return _match_cents(price_match) / 100 if price_match else None
+
+# Browser settings shared by all crawls
+BROWSER_CONFIG = BrowserConfig(
+    headless=True,
+    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# Shared crawler, launched on first use and reused across scrapes; lives on the scrape loop
+_crawler = None
+_crawler_lock = None
+
+async def _get_crawler() -> AsyncWebCrawler:
+    """Get the shared crawler, launching its browser if needed; call on the scrape loop"""
+    global _crawler, _crawler_lock
+    
+    if _crawler_lock is None:
+        _crawler_lock = asyncio.Lock()
+    
+    async with _crawler_lock:
+        if _crawler is None:
+            crawler = AsyncWebCrawler(config=BROWSER_CONFIG)
+            await crawler.start()
+            _crawler = crawler
+            logger.info("Started shared crawler")
+    
+    return _crawler
+
+async def _close_crawler() -> None:
+    """Close the shared crawler if one is running"""
+    global _crawler
+    
+    if _crawler is not None:
+        crawler, _crawler = _crawler, None
+        await crawler.close()
+        logger.info("Closed shared crawler")
+
+async def close_crawler() -> None:
+    """Close the shared crawler from any event loop"""
+    await run_on_scrape_loop(_close_crawler())
+
+close_at_exit(_close_crawler)
+
+def _build_schema(debug: bool = False) -> dict:
+    """Build the product extraction schema; debug adds the raw price-per-unit HTML"""
+    schema = {
+        "type": "array",
+        "baseSelector": "article.product-container",
+        "fields": [
+            {
+                "name": "name",
+                "selector": ".title-link",
+                "type": "text"
+            },
+            {
+                "name": "image",
+                "selector": ".product-image img",
+                "type": "attribute",
+                "attribute": "src"
+            },
+            {
+                "name": "link",
+                "selector": "a.link",
+                "type": "attribute",
+                "attribute": "href",
+                "transform": "return value.startsWith('http') ? value : `https://www.jumbo.com${value}`;"
+            },
+            {
+                "name": "price",
+                "selector": ".current-price",
+                "type": "text",
+                "transform": "const match = value.match(/€\\s*(\\d+)[,\\.]?(\\d{0,2})/); if (!match) return ''; const euros = match[1]; const cents = match[2] || '00'; return `€${euros}.${cents.padEnd(2, '0')}`;"
+            },
+            {
+                # Numeric price, computed in the extraction pass from the price text
+                "name": "price_value",
+                "type": "computed",
+                "function": _price_value
+            },
+            {
+                "name": "original_price",
+                "selector": ".old-price",
+                "type": "text",
+                "transform": "const match = value?.match(/€\\s*(\\d+)[,\\.]?(\\d{0,2})/); if (!match) return null; const euros = match[1]; const cents = match[2] || '00'; return `€${euros}.${cents.padEnd(2, '0')}`;"
+            },
+            {
+                "name": "is_sale",
+                "selector": ".promotional-price, .bonus-price",
+                "type": "exists"
+            },
+            {
+                "name": "unit_size",
+                "selector": ".title-link",
+                "type": "text",
+                "transform": "const match = value.match(/(\\d+)\\s*([gk]|kg|gram|plakken|stuk)(?:[^a-z]|$)/i); if (match) { const num = match[1]; const unit = match[2].toLowerCase(); if (unit === 'g' || unit === 'gram') return num + 'g'; if (unit === 'k' || unit === 'kg') return (num * 1000) + 'g'; if (unit === 'plakken') return num + ' plakken'; return num + ' stuk'; } else { const lowerValue = value.toLowerCase(); if (lowerValue.includes('half') || lowerValue.endsWith('-half') || lowerValue.endsWith(' half')) return '400g'; if (lowerValue.includes('heel') || lowerValue.endsWith('-heel') || lowerValue.endsWith(' heel')) return '800g'; return ''; }"
+            },
+            {
+                "name": "price_per_unit_value",
+                "selector": ".price-per-unit span[aria-hidden='true']:first-child",
+                "type": "text",
+                "transform": "return parseFloat(value.replace(',', '.'));"
+            },
+            {
+                "name": "price_per_unit_unit",
+                "selector": ".price-per-unit span[aria-hidden='true']:last-child",
+                "type": "text",
+                "transform": "return value.trim();"
+            },
+            {
+                "name": "unit_price",
+                "selector": ".price-per-unit .screenreader-only",
+                "type": "text",
+                "transform": "return value.replace('<!--[-->', '').replace('<!--]-->', '').trim();"
+            },
+            {
+                "name": "properties",
+                "selector": ".product-label",
+                "type": "text",
+                "multiple": True
+            },
+            {
+                "name": "brand",
+                "selector": ".product-brand",
+                "type": "text"
+            }
+        ]
+    }
+    if debug:
+        schema["fields"].append({
             "name": "debug_html",
             "selector": ".price-per-unit",
             "type": "html"
-        },
-        {
-            "name": "price_per_unit_value",
-            "selector": ".price-per-unit span[aria-hidden='true']:first-child",
-            "type": "text",
-            "transform": "return parseFloat(value.replace(',', '.'));"
-        },
-        {
-            "name": "price_per_unit_unit",
-            "selector": ".price-per-unit span[aria-hidden='true']:last-child",
-            "type": "text",
-            "transform": "return value.trim();"
-        },
-        {
-            "name": "unit_price",
-            "selector": ".price-per-unit .screenreader-only",
-            "type": "text",
-            "transform": "return value.replace('<!--[-->', '').replace('<!--]-->', '').trim();"
-        },
-        {
-            "name": "properties",
-            "selector": ".product-label",
-            "type": "text",
-            "multiple": True
-        },
-        {
-            "name": "brand",
-            "selector": ".product-brand",
-            "type": "text"
-        }
-    ]
-}
-
-async def scrape_jumbo_products(search_term: str) -> list:
-    """
-    Scrape Jumbo products for a given search term, using cache when possible
-    """
-    logger.info(f"Starting product search for: {search_term}")
+        })
+    return schema
+
+# Schema for product extraction
+PRODUCT_SCHEMA = _build_schema()
+
+def _build_product(product: dict, scraped_at: str) -> dict:
+    """Format one extracted product, or return None if it lacks a name, link or price"""
+    # Skip products missing the fields every result needs
+    name = product.get('name')
+    link = product.get('link')
+    price = product.get('price_value')  # Numeric price from the schema's computed field
+    if not name or not link or price is None:
+        return None
+    
+    # Parse unit price into value and unit
+    unit_price = product.get('unit_price', '')
+    price_per_unit_value = None
+    price_per_unit_unit = None
+    
+    if unit_price:
+        # Extract numeric value and unit from unit price string
+        # e.g. "€ 2,19 per stuk" -> (2.19, "stuk")
+        unit_price_match = _UNIT_PRICE_RE.search(unit_price)
+        if unit_price_match:
+            price_per_unit_value = _match_cents(unit_price_match) / 100
+            price_per_unit_unit = unit_price_match.group(3)
+    
+    # Extract unit size from product data
+    unit_size = product.get('unit_size', '')
+    if not unit_size:
+        unit_size = extract_unit_size(name)
+    if not unit_size and price_per_unit_unit:
+        # If we have a per-unit price but no unit size, try to infer a standard size
+        if price_per_unit_unit == 'stuk':
+            unit_size = '1 stuk'
+        elif price_per_unit_unit == 'kilo':
+            # Assume standard bread size if not specified
+            unit_size = '800g'
+    
+    # Format the product data
+    return {
+        'name': name,
+        'image': product.get('image', ''),
+        'link': link if link.startswith('http') else f"https://www.jumbo.com{link}",
+        'price': price,
+        'unit_size': unit_size,
+        'store': 'jumbo',
+        'scraped_at': scraped_at,
+        'unit_price': unit_price,
+        'price_per_unit_value': price_per_unit_value,
+        'price_per_unit_unit': price_per_unit_unit
+    }
+
+def _iter_products(raw_products: list, scraped_at: str):
+    """Yield the formatted products, skipping incomplete ones"""
+    for product in raw_products:
+        built = _build_product(product, scraped_at)
+        if built is not None:
+            yield built
+
+async def _load_cached_products(search_term: str) -> list:
+    """Get products from the in-process cache or a fresh cache file, or None"""
+    cached_products = _memory_cache_get(search_term)
+    if cached_products is not None:
+        return cached_products
     
-    # Check cache first
     cache_file = get_cache_file(search_term)
-    if not should_update_cache(cache_file):
-        cached_products = load_from_cache(search_term)
+    if not await should_update_cache(cache_file):
+        cached_products = await load_from_cache(search_term)
         if cached_products is not None:
+            _memory_cache_put(search_term, cached_products)
             return cached_products
     
-    logger.info(f"Cache needs update, scraping fresh data for: {search_term}")
-    
-    # Configure browser settings
-    browser_config = BrowserConfig(
-        headless=True,
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    )
+    return None
+
+async def _crawl_products(crawler: AsyncWebCrawler, search_term: str) -> list:
+    """Scrape one search term with an open crawler and cache the results"""
+    url = f"https://www.jumbo.com/zoeken?searchType=keyword&searchTerms={search_term}"
+    logger.info("Crawling URL: %s", url)
     
     try:
-        # Initialize and run crawler
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            url = f"https://www.jumbo.com/zoeken?searchType=keyword&searchTerms={search_term}"
-            logger.info(f"Crawling URL: {url}")
-            
-            try:
-                # Extract the products
-                result = await crawler.arun(
-                    url=url,
-                    config=CrawlerRunConfig(
-                        extraction_strategy=JsonCssExtractionStrategy(
-                            PRODUCT_SCHEMA,
-                            verbose=True
-                        ),
-                        cache_mode=CacheMode.BYPASS,
-                        wait_for=".product-container",
-                        js_code="""
-                            async function handlePage() {
-                                const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
-                                
-                                // Handle cookie consent if present
-                                try {
-                                    const cookieButton = document.querySelector('button[data-test="accept-cookies-button"]');
-                                    if (cookieButton) {
-                                        cookieButton.click();
-                                        await delay(1000);
-                                    }
-                                } catch (e) {
-                                    console.log('No cookie banner found');
-                                }
-                                
-                                // Wait for products to load
-                                let attempts = 0;
-                                while (attempts < 10) {
-                                    const products = document.querySelectorAll('article.product-container');
-                                    if (products.length > 0) break;
-                                    await delay(1000);
-                                    attempts++;
-                                }
-                                
-                                // Single scroll to load more products
-                                window.scrollTo(0, document.documentElement.scrollHeight);
-                                await delay(2000);
-                                
-                                return true;
+        # Extract the products
+        result = await crawler.arun(
+            url=url,
+            config=CrawlerRunConfig(
+                extraction_strategy=JsonCssExtractionStrategy(
+                    PRODUCT_SCHEMA,
+                    verbose=True
+                ),
+                cache_mode=CacheMode.BYPASS,
+                wait_for=".product-container",
+                js_code="""
+                    async function handlePage() {
+                        const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
+                        
+                        // Handle cookie consent if present
+                        try {
+                            const cookieButton = document.querySelector('button[data-test="accept-cookies-button"]');
+                            if (cookieButton) {
+                                cookieButton.click();
+                                await delay(1000);
                             }
-                            
-                            handlePage();
-                        """
-                    )
-                )
-                
-                if result.extracted_content:
-                    # Parse extracted content
-                    raw_products = json.loads(result.extracted_content)
-                    logger.info(f"Successfully extracted {len(raw_products)} products")
+                        } catch (e) {
+                            console.log('No cookie banner found');
+                        }
+                        
+                        // Wait for products to load
+                        let attempts = 0;
+                        while (attempts < 10) {
+                            const products = document.querySelectorAll('article.product-container');
+                            if (products.length > 0) break;
+                            await delay(1000);
+                            attempts++;
+                        }
+                        
+                        // Single scroll to load more products
+                        window.scrollTo(0, document.documentElement.scrollHeight);
+                        await delay(2000);
+                        
+                        return true;
+                    }
                     
-                    # Process and format products
-                    products = []
-                    for product in raw_products:
-                        try:
-                            # Extract numeric price values
-                            price_match = re.search(r'€\s*(\d+)[,\.]?(\d{0,2})', product['price'])
-                            if not price_match:
-                                continue
-                            
-                            price = float(f"{price_match.group(1)}.{price_match.group(2) or '00'}")
-                            
-                            # Parse unit price into value and unit
-                            unit_price = product.get('unit_price', '')
-                            price_per_unit_value = None
-                            price_per_unit_unit = None
-                            
-                            if unit_price:
-                                # Extract numeric value and unit from unit price string
-                                # e.g. "€ 2,19 per stuk" -> (2.19, "stuk")
-                                unit_price_match = re.search(r'€\s*(\d+)[,\.]?(\d{0,2})\s+per\s+(\w+)', unit_price)
-                                if unit_price_match:
-                                    price_per_unit_value = float(f"{unit_price_match.group(1)}.{unit_price_match.group(2) or '00'}")
-                                    price_per_unit_unit = unit_price_match.group(3)
-                            
-                            # Extract unit size from product data
-                            unit_size = product.get('unit_size', '')
-                            if not unit_size:
-                                unit_size = extract_unit_size(product['name'])
-                            if not unit_size and price_per_unit_unit:
-                                # If we have a per-unit price but no unit size, try to infer a standard size
-                                if price_per_unit_unit == 'stuk':
-                                    unit_size = '1 stuk'
-                                elif price_per_unit_unit == 'kilo':
-                                    # Assume standard bread size if not specified
-                                    unit_size = '800g'
-                            
-                            # Format the product data
-                            formatted_product = {
-                                'name': product['name'],
-                                'image': product['image'],
-                                'link': product['link'] if product['link'].startswith('http') else f"https://www.jumbo.com{product['link']}",
-                                'price': price,
-                                'unit_size': unit_size,
-                                'store': 'jumbo',
-                                'scraped_at': datetime.now().isoformat(),
-                                'unit_price': unit_price,
-                                'price_per_unit_value': price_per_unit_value,
-                                'price_per_unit_unit': price_per_unit_unit
-                            }
-                            
-                            products.append(formatted_product)
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing product: {str(e)}")
-                            continue
-                    
-                    # Sort products by price
-                    products.sort(key=lambda x: x['price'])
-                    
-                    # After successful scraping, save to cache
-                    if products:
-                        save_to_cache(search_term, products)
-                    
-                    return products
-                    
-                else:
-                    logger.error("No content was extracted")
-                    return []
-                    
-            except Exception as e:
-                logger.error(f"Error during crawling: {str(e)}")
-                raise
-                
+                    handlePage();
+                """
+            )
+        )
+        
+        if result.extracted_content:
+            # Parse extracted content
+            raw_products = orjson.loads(result.extracted_content)
+            logger.info("Successfully extracted %d products", len(raw_products))
+            
+            # Format and sort products by price in one pass, all stamped with the same scrape time
+            scraped_at = datetime.now().isoformat()
+            products = sorted(_iter_products(raw_products, scraped_at), key=itemgetter('price'))
+            
+            # After successful scraping, save to cache
+            if products:
+                await save_to_cache(search_term, products)
+            
+            return products
+        
+        else:
+            logger.error("No content was extracted")
+            return []
+    
+    except Exception as e:
+        logger.error("Error during crawling: %s", e)
+        raise
+
+async def scrape_jumbo_products_many(search_terms: list[str], concurrency: int = 10,
+                                     force_refresh: bool = False) -> dict:
+    """
+    Scrape Jumbo products for several search terms on the shared crawler.
+    Returns a dict mapping each term to its products, or to the exception its scrape raised.
+    With force_refresh, cached results are ignored and replaced once a scrape succeeds.
+    """
+    # The shared crawler lives on the scrape loop, so scrape there
+    return await run_on_scrape_loop(_scrape_jumbo_products_many(search_terms, concurrency, force_refresh))
+
+async def _scrape_jumbo_products_many(search_terms: list[str], concurrency: int, force_refresh: bool) -> dict:
+    """Scrape several search terms on the scrape loop"""
+    results = {}
+    to_crawl = []
+    for search_term in dict.fromkeys(search_terms):
+        logger.info("Starting product search for: %s", search_term)
+        cached_products = None if force_refresh else await _load_cached_products(search_term)
+        if cached_products is not None:
+            results[search_term] = cached_products
+        else:
+            logger.info("Cache needs update, scraping fresh data for: %s", search_term)
+            to_crawl.append(search_term)
+    
+    if not to_crawl:
+        return results
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def crawl(crawler, search_term):
+        async with semaphore:
+            return await _crawl_products(crawler, search_term)
+    
+    try:
+        # Run the page loads concurrently on the shared crawler
+        crawler = await _get_crawler()
+        crawled = await asyncio.gather(
+            *(crawl(crawler, search_term) for search_term in to_crawl),
+            return_exceptions=True
+        )
     except Exception as e:
-        logger.error(f"Error during scraping: {str(e)}")
+        logger.error("Error during scraping: %s", e)
         raise
+    
+    results.update(zip(to_crawl, crawled))
+    return results
+
+async def scrape_jumbo_products(search_term: str, force_refresh: bool = False) -> list:
+    """
+    Scrape Jumbo products for a given search term, using cache when possible
+    """
+    products = (await scrape_jumbo_products_many([search_term], force_refresh=force_refresh))[search_term]
+    if isinstance(products, Exception):
+        raise products
+    return products
 
 def extract_unit_size(name: str) -> str:
     """Extract unit size from product name."""
     if not name:
         return ''
     
-    # Common patterns for unit sizes
-    patterns = [
-        # Match piece counts first: "6 stuks", "6stuks", "10 Stuks"
-        r'(\d+)\s*stuks?\b',
-        # Match slice counts: "10 plakken", "10plakken"
-        r'(\d+)\s*plakk?(?:en)?\b',
-        # Match kilogram amounts: "1kg", "1 kg", "1 kilo", "1kilo"
-        r'(\d+(?:[.,]\d+)?)\s*k(?:ilo|g)\b',
-        # Match gram amounts: "400g", "400 g", "400 gram", "400gram"
-        r'(\d+(?:[.,]\d+)?)\s*(?:g(?:ram)?)\b'
-    ]
-    
     name = name.lower()
     
     # First check bread-specific patterns
     if name.endswith('half'):
         return "400g"  # Standard weight for half bread
-    elif any(word in name for word in [' heel', '-heel']):
+    elif ' heel' in name or '-heel' in name:
         return "800g"  # Standard weight for whole bread
     elif 'half' in name:
         return "400g"  # Standard weight for half bread
     
-    # Then try the generic patterns
-    for pattern in patterns:
-        match = re.search(pattern, name, re.IGNORECASE)
-        if match:
-            value = match.group(1)
-            # Determine the unit based on the pattern
-            if 'stuk' in pattern:
-                return f"{value} stuks"
-            elif 'plak' in pattern:
-                return f"{value} plakken"
-            elif 'k' in pattern and ('kg' in pattern or 'kilo' in pattern):
-                # Convert kg to g for consistency
-                value = float(value.replace(',', '.')) * 1000
-                return f"{value}g"
-            elif 'g' in pattern:
-                return f"{value}g"
+    # Then try the generic pattern
+    match = _UNIT_SIZE_RE.search(name)
+    if match:
+        tag = match.lastgroup
+        value = match.group(tag)
+        # Determine the unit based on the group that matched
+        if tag == 'stuk':
+            return f"{value} stuks"
+        elif tag == 'plak':
+            return f"{value} plakken"
+        elif tag == 'kg':
+            # Convert kg to g for consistency
+            value = float(value.replace(',', '.')) * 1000
+            return f"{value}g"
+        else:
+            return f"{value}g"
     
     return ''
 
@@ -368,8 +520,11 @@ if __name__ == "__main__":
     # Test the scraper
     async def test():
         search_term = sys.argv[1] if len(sys.argv) > 1 else "kaas"
-        products = await scrape_jumbo_products(search_term)
-        with open('jumbo_products.json', 'w', encoding='utf-8') as f:
-            json.dump(products, f, ensure_ascii=False, indent=2)
+        try:
+            products = await scrape_jumbo_products(search_term)
+        finally:
+            await close_crawler()
+        with open('jumbo_products.json', 'wb') as f:
+            f.write(orjson.dumps(products, option=orjson.OPT_INDENT_2))
     
     asyncio.run(test())
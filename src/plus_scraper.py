@@ -1,77 +1,120 @@
 import re
-import json
+import time
+import zlib
+import orjson
 import logging
 import asyncio
+import concurrent.futures
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime, timedelta
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
-import random
+from scrape_loop import run_on_scrape_loop, close_at_exit
+from cache_io import write_cache_file
 
 # Configure logging
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
 logger = logging.getLogger(__name__)
 
+# Store name set on every product
+_STORE = 'plus'
+
 # Cache settings
 CACHE_DIR = Path("cache")
 CACHE_DURATION = timedelta(hours=12)  # Base cache duration
-CACHE_DURATION_VARIANCE = timedelta(hours=4)  # Random variance to spread updates
+CACHE_DURATION_VARIANCE = timedelta(hours=4)  # Per-term variance to spread updates
+EMPTY_CACHE_TTL = 300  # Seconds to cache a failed or empty scrape
+
+# Scrapes in progress per search term. concurrent.futures futures can be awaited
+# from any event loop, and the app runs each request on its own loop.
+_inflight: dict[str, concurrent.futures.Future] = {}
+
+# Unit size pattern for extract_unit_size: "400 g"/"400 gram", "1,5 kg"/"1 k", "6 stuks",
+# "2 x stuk", "10 plakken". Matches only start at the beginning of a digit run and the
+# quantifiers are possessive, so a title is scanned in linear time.
+_PER_PREFIX_RE = re.compile(r'^per\s+')
+_UNIT_RE = re.compile(
+    r'(?<!\d)(?P<num>\d++(?:[.,]\d++)?)\s*+(?:x\s*+)?'
+    r'(?P<unit>kilo(?:gram)?s?|kg?|grams?|gr?|stuks?|plak(?:ken|jes)?)\b'
+)
+_NUMERIC_RE = re.compile(r'^(\d+)$')
+
+# Translation tables that delete everything but digits (and dots) from ASCII text
+_DEL_NON_DIGITS = str.maketrans({c: None for c in map(chr, range(128)) if not c.isdigit()})
+_DEL_NON_PRICE = str.maketrans({c: None for c in map(chr, range(128)) if not (c.isdigit() or c == '.')})
+_DEL_NON_SLUG = str.maketrans({c: None for c in map(chr, range(128)) if not (c in '0123456789-' or 'a' <= c <= 'z')})
+
+# Unit size patterns for calculate_price_per_unit
+_PPU_STUK_RE = re.compile(r'(\d+)\s*stuk')
+_PPU_GRAM_RE = re.compile(r'per\s*(\d+(?:[.,]\d+)?)\s*g')
+_PPU_KG_RE = re.compile(r'per\s*(\d+(?:[.,]\d+)?)\s*kg')
+
+# Patterns for building product links
+_IMG_ID_RE = re.compile(r'/(\d+)_M/')  # e.g. .../140299_M/...
+_DASHES_RE = re.compile(r'-+')
+
+# Common brand prefixes, as a tuple so str.startswith can check them all in one call
+_KNOWN_BRANDS = ("PLUS", "AH", "Jumbo", "Milner", "Beemster", "Old Amsterdam", "Leerdammer")
 
 def get_cache_file(search_term: str) -> Path:
     """Get the cache file path for a search term."""
     CACHE_DIR.mkdir(exist_ok=True)
     return CACHE_DIR / f"plus_{search_term.lower().replace(' ', '_')}_cache.json"
 
-def should_update_cache(cache_file: Path) -> bool:
-    """Check if the cache should be updated."""
-    if not cache_file.exists():
-        return True
-    
+@lru_cache(maxsize=4096)
+def _cache_duration(cache_key: str) -> float:
+    """Get the cache duration in seconds for a cache key, with a variance that is stable per key."""
+    # crc32 instead of hash() so the variance is the same in every process
+    variance_seconds = int(CACHE_DURATION_VARIANCE.total_seconds())
+    variance = zlib.crc32(cache_key.encode()) % (2 * variance_seconds) - variance_seconds
+    return CACHE_DURATION.total_seconds() + variance
+
+async def should_update_cache(cache_file: Path) -> bool:
+    """Check if the cache should be updated, based on the cache file's mtime."""
     try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-            
-        # Get the cache timestamp
-        cache_time = datetime.fromisoformat(cache_data.get('timestamp', '2000-01-01'))
-        
-        # Add random variance to cache duration
-        variance = random.uniform(-CACHE_DURATION_VARIANCE.total_seconds(), 
-                                CACHE_DURATION_VARIANCE.total_seconds())
-        actual_duration = CACHE_DURATION + timedelta(seconds=variance)
-        
-        # Check if cache has expired
-        return datetime.now() - cache_time > actual_duration
-        
-    except Exception as e:
-        logger.error(f"Error reading cache: {str(e)}")
+        # stat() off the event loop too, like the cache reads and writes
+        stat = await asyncio.to_thread(cache_file.stat)
+    except FileNotFoundError:
         return True
+    age = time.time() - stat.st_mtime
+    
+    # Check if cache has expired
+    return age > _cache_duration(cache_file.name)
 
-def save_to_cache(search_term: str, products: list) -> None:
-    """Save products to cache."""
+async def save_to_cache(search_term: str, products: list, ttl: int = None) -> None:
+    """Save products to cache, writing the file off the event loop. A ttl (seconds) expires the entry early."""
     cache_file = get_cache_file(search_term)
     cache_data = {
         'timestamp': datetime.now().isoformat(),
         'products': products
     }
+    if ttl is not None:
+        cache_data['ttl'] = ttl
     
     try:
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        data = orjson.dumps(cache_data, option=orjson.OPT_INDENT_2)
+        await asyncio.to_thread(write_cache_file, cache_file, data)
         logger.info(f"Saved {len(products)} products to cache for '{search_term}'")
     except Exception as e:
         logger.error(f"Error saving to cache: {str(e)}")
 
-def load_from_cache(search_term: str) -> list:
-    """Load products from cache."""
+async def load_from_cache(search_term: str) -> list:
+    """Load products from cache, reading the file off the event loop."""
     cache_file = get_cache_file(search_term)
     
     try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
+        cache_data = orjson.loads(await asyncio.to_thread(cache_file.read_bytes))
+        
+        # Entries with their own ttl, like empty results, expire before the cache duration
+        ttl = cache_data.get('ttl')
+        if ttl is not None and time.time() - (await asyncio.to_thread(cache_file.stat)).st_mtime > ttl:
+            return None
+        
         products = cache_data.get('products', [])
         logger.info(f"Loaded {len(products)} products from cache for '{search_term}'")
         return products
@@ -79,12 +122,25 @@ def load_from_cache(search_term: str) -> list:
         logger.error(f"Error loading from cache: {str(e)}")
         return None
 
+def _keep_chars(value: str, table: dict) -> str:
+    """Drop non-ASCII characters, then the ones the translation table deletes"""
+    return value.encode('ascii', 'ignore').decode('ascii').translate(table)
+
+def _slugify(name: str) -> str:
+    """Convert a lowercase product name to the URL-friendly format of Plus product links."""
+    # Drop special chars per word, then join the words with hyphens
+    words = (_keep_chars(word, _DEL_NON_SLUG) for word in name.split())
+    url_name = '-'.join(word for word in words if word)
+    if '--' in url_name:
+        url_name = _DASHES_RE.sub('-', url_name)  # Remove multiple hyphens
+    return url_name
+
 def parse_price_integer(price_str: str) -> int:
     """Parse the integer part of the price."""
     if not price_str or not isinstance(price_str, str):
         return 0
     # Remove any non-numeric characters except dots
-    clean_str = ''.join(c for c in price_str if c.isdigit() or c == '.')
+    clean_str = _keep_chars(price_str, _DEL_NON_PRICE)
     try:
         # Remove trailing dot if present
         clean_str = clean_str.rstrip('.')
@@ -97,7 +153,7 @@ def parse_price_decimal(price_str: str) -> int:
     if not price_str or not isinstance(price_str, str):
         return 0
     # Remove any non-numeric characters
-    clean_str = ''.join(c for c in price_str if c.isdigit())
+    clean_str = _keep_chars(price_str, _DEL_NON_DIGITS)
     try:
         return int(clean_str) if clean_str else 0
     except (ValueError, TypeError):
@@ -107,22 +163,22 @@ def parse_price(price_integer: str, price_decimal: str) -> float:
     """Combine integer and decimal parts into a single price."""
     try:
         # Clean and parse integer part
-        integer_str = ''.join(c for c in price_integer if c.isdigit() or c == '.')
-        integer_str = integer_str.rstrip('.')
+        integer_str = _keep_chars(price_integer, _DEL_NON_PRICE).rstrip('.')
         integer_val = int(integer_str) if integer_str else 0
         
         # Clean and parse decimal part
-        decimal_str = ''.join(c for c in price_decimal if c.isdigit())
+        decimal_str = _keep_chars(price_decimal, _DEL_NON_DIGITS)
         decimal_val = int(decimal_str) if decimal_str else 0
         
         # Combine into final price
         price = float(f"{integer_val}.{decimal_val:02d}")
-        logger.debug(f"Parsed price: {price} from integer: {price_integer}, decimal: {price_decimal}")
+        logger.debug("Parsed price: %s from integer: %s, decimal: %s", price, price_integer, price_decimal)
         return price
-    except (ValueError, TypeError) as e:
+    except (ValueError, TypeError, AttributeError) as e:
         logger.error(f"Error parsing price: {e} (integer: {price_integer}, decimal: {price_decimal})")
         return 0.0
 
+@lru_cache(maxsize=4096)
 def extract_unit_size(value: str) -> str:
     """Extract unit size from product title."""
     if not value:
@@ -130,69 +186,53 @@ def extract_unit_size(value: str) -> str:
         
     # Remove 'Per' prefix if present and clean up
     value = value.lower().strip()
-    value = re.sub(r'^per\s+', '', value)
-    
-    # Handle "Per X" format first
-    per_match = re.search(r'(\d+(?:[.,]\d+)?)\s*([gk]|kg|gram)', value)
-    if per_match:
-        num = per_match.group(1).replace(',', '.')
-        unit = per_match.group(2).lower()
-        if unit in ['k', 'kg']:
+    value = _PER_PREFIX_RE.sub('', value)
+    
+    # Scan the units once; a weight wins over a piece or slice count
+    counts = {}
+    for match in _UNIT_RE.finditer(value):
+        num, unit = match.group('num', 'unit')
+        num = num.replace(',', '.')
+        
+        # Convert to standard format (grams)
+        if unit[0] == 'k':
             return f"{int(float(num) * 1000)}g"
-        return f"{num}g"
+        if unit[0] == 'g':
+            return f"{num}g"
+        counts.setdefault(unit[0], num)
     
     # Handle pieces (stuks)
-    stuk_match = re.search(r'(\d+)\s*(?:x\s*)?stuk', value)
-    if stuk_match:
-        return f"{stuk_match.group(1)} stuk"
+    if 's' in counts:
+        return f"{counts['s']} stuk"
     
     # Handle slices (plakken)
-    plak_match = re.search(r'(\d+)\s*(?:x\s*)?plak(?:ken)?', value)
-    if plak_match:
-        return f"{plak_match.group(1)} plakken"
-    
-    # Handle weight units
-    weight_match = re.search(r'(\d+(?:[.,]\d+)?)\s*([gk]|kg|gram)(?:[^a-z]|$)', value)
-    if weight_match:
-        num = weight_match.group(1).replace(',', '.')
-        unit = weight_match.group(2).lower()
-        
-        # Convert to standard format (grams)
-        if unit in ['g', 'gram']:
-            return f"{int(float(num))}g"
-        if unit in ['k', 'kg']:
-            try:
-                grams = int(float(num) * 1000)
-                return f"{grams}g"
-            except (ValueError, TypeError):
-                return f"{int(float(num) * 1000)}g"
+    if 'p' in counts:
+        return f"{counts['p']} plakken"
     
     # Handle special cases
     if any(x in value for x in ['half', '-half', ' half']):
         return '400g'  # Standard half size
         
     # Handle numeric-only values (assume grams)
-    numeric_match = re.search(r'^(\d+)$', value)
+    numeric_match = _NUMERIC_RE.search(value)
     if numeric_match:
         return f"{numeric_match.group(1)}g"
     
     return value
 
+@lru_cache(maxsize=4096)
 def extract_brand(name: str) -> str:
     """Extract brand from product name."""
     if not name:
         return ""
     
-    # Common brand prefixes
-    known_brands = ["PLUS", "AH", "Jumbo", "Milner", "Beemster", "Old Amsterdam", "Leerdammer"]
-    
     # Try to match known brands first
-    for brand in known_brands:
-        if name.startswith(brand):
-            return brand
+    if name.startswith(_KNOWN_BRANDS):
+        return next(brand for brand in _KNOWN_BRANDS if name.startswith(brand))
     
-    # If no known brand found, take first word
-    return name.split()[0] if name else ""
+    # If no known brand found, take first word without splitting the rest of the name
+    first_word = name.split(maxsplit=1)
+    return first_word[0] if first_word else ""
 
 # Schema for product extraction
 PRODUCT_SCHEMA = {
@@ -223,7 +263,8 @@ PRODUCT_SCHEMA = {
         {
             "name": "price",
             "type": "computed",
-            "compute": lambda item: parse_price(item.get('_price_integer', ''), item.get('_price_decimal', '')),
+            # crawl4ai calls "function" with the fields extracted so far; None leaves the field out
+            "function": lambda item: parse_price(item.get('_price_integer', ''), item.get('_price_decimal', '')) or None,
             "output": True,
             "required": True
         },
@@ -249,6 +290,35 @@ PRODUCT_SCHEMA = {
     "wait_for": ".list-item.cart-item-wrapper.plp-item-wrapper"
 }
 
+# Extract products using JSON CSS strategy, built once and shared by all crawls
+_EXTRACTION_STRATEGY = JsonCssExtractionStrategy(PRODUCT_SCHEMA)
+
+# Page script run on every search page
+_PLUS_JS_CODE = """
+    // Products are already on the page: crawl4ai runs this after wait_for, and
+    // awaits the script, but afterwards only waits for domcontentloaded
+    const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
+    const productSelector = '.list-item.cart-item-wrapper.plp-item-wrapper';
+    
+    // Handle cookie consent if present
+    const cookieButton = document.querySelector('#accept-cookies');
+    if (cookieButton) {
+        cookieButton.click();
+    }
+    
+    // Scroll to load more products, then wait until more cards show up (or give up after 2s)
+    const loaded = document.querySelectorAll(productSelector).length;
+    window.scrollTo(0, document.documentElement.scrollHeight);
+    for (let waited = 0; waited < 2000; waited += 100) {
+        if (document.querySelectorAll(productSelector).length > loaded) {
+            break;
+        }
+        await delay(100);
+    }
+    
+    return true;
+"""
+
 def calculate_price_per_unit(price: float, unit_size: str) -> tuple[float, str]:
     """Calculate price per unit (kg or piece) from price and unit size."""
     if not unit_size:
@@ -258,14 +328,14 @@ def calculate_price_per_unit(price: float, unit_size: str) -> tuple[float, str]:
     unit_size = unit_size.lower()
     
     # Handle pieces (stuks)
-    stuk_match = re.search(r'(\d+)\s*stuk', unit_size)
+    stuk_match = _PPU_STUK_RE.search(unit_size)
     if stuk_match:
         pieces = int(stuk_match.group(1))
         if pieces > 0:
             return price / pieces, "stuk"
     
     # Handle weight in grams
-    gram_match = re.search(r'per\s*(\d+(?:[.,]\d+)?)\s*g', unit_size)
+    gram_match = _PPU_GRAM_RE.search(unit_size)
     if gram_match:
         grams = float(gram_match.group(1).replace(',', '.'))
         if grams > 0:
@@ -273,7 +343,7 @@ def calculate_price_per_unit(price: float, unit_size: str) -> tuple[float, str]:
             return (price * 1000) / grams, "kilo"
     
     # Handle weight in kg
-    kg_match = re.search(r'per\s*(\d+(?:[.,]\d+)?)\s*kg', unit_size)
+    kg_match = _PPU_KG_RE.search(unit_size)
     if kg_match:
         kgs = float(kg_match.group(1).replace(',', '.'))
         if kgs > 0:
@@ -281,168 +351,234 @@ def calculate_price_per_unit(price: float, unit_size: str) -> tuple[float, str]:
             
     return None, None
 
-async def scrape_plus_products(search_term: str) -> list:
-    """Scrape products from Plus supermarket."""
-    logger.info(f"Starting product search for '{search_term}'")
+# Browser settings shared by all Plus crawls
+BROWSER_CONFIG = BrowserConfig(
+    headless=True,  # Set to true for better performance
+    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# Shared crawler, launched on first use and reused across scrapes; lives on the scrape loop
+_crawler = None
+_crawler_lock = None
+
+async def _get_crawler() -> AsyncWebCrawler:
+    """Get the shared crawler, launching its browser if needed; call on the scrape loop."""
+    global _crawler, _crawler_lock
     
-    # Check cache first
-    cache_file = get_cache_file(search_term)
-    if not should_update_cache(cache_file):
-        cached_products = load_from_cache(search_term)
-        if cached_products:
-            return cached_products
+    if _crawler_lock is None:
+        _crawler_lock = asyncio.Lock()
     
-    # Configure browser
-    browser_config = BrowserConfig(
-        headless=True,  # Set to true for better performance
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    )
+    async with _crawler_lock:
+        if _crawler is None:
+            crawler = AsyncWebCrawler(config=BROWSER_CONFIG)
+            await crawler.start()
+            _crawler = crawler
+            logger.info("Started shared crawler")
     
-    try:
-        # Initialize and run crawler
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            # Construct search URL
-            url = f"https://www.plus.nl/zoekresultaten?SearchTerm={search_term}"
-            
-            # Extract products using JSON CSS strategy
-            strategy = JsonCssExtractionStrategy(PRODUCT_SCHEMA)
-            result = await crawler.arun(
-                url=url,
-                config=CrawlerRunConfig(
-                    extraction_strategy=strategy,
-                    cache_mode=CacheMode.BYPASS,
-                    wait_for=".list-item.cart-item-wrapper.plp-item-wrapper",
-                    js_code="""
-                        async function handlePage() {
-                            const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
-                            
-                            // Handle cookie consent if present
-                            try {
-                                const cookieButton = document.querySelector('#accept-cookies');
-                                if (cookieButton) {
-                                    cookieButton.click();
-                                    await delay(1000);
-                                }
-                            } catch (e) {
-                                console.log('No cookie banner found');
-                            }
-                            
-                            // Wait for products to load
-                            let attempts = 0;
-                            const maxAttempts = 20;
-                            while (attempts < maxAttempts) {
-                                const products = document.querySelectorAll('.list-item.cart-item-wrapper.plp-item-wrapper');
-                                if (products.length > 0) {
-                                    console.log(`Found ${products.length} products`);
-                                    break;
-                                }
-                                await delay(500);
-                                attempts++;
-                                console.log(`Waiting for products... Attempt ${attempts}/${maxAttempts}`);
-                            }
-                            
-                            // Scroll to load more products
-                            window.scrollTo(0, document.documentElement.scrollHeight);
-                            await delay(2000);
-                            
-                            return true;
-                        }
-                        
-                        handlePage();
-                    """
-                )
-            )
-            
-            if not result.extracted_content:
-                logger.warning("No products extracted")
-                return []
-            
-            products = json.loads(result.extracted_content)
-            logger.debug(f"Extracted {len(products)} products from page")
-            
-            if not products:
-                logger.warning("No products found in extracted content")
-                return []
+    return _crawler
+
+async def _close_crawler() -> None:
+    """Close the shared crawler if one is running."""
+    global _crawler
+    
+    if _crawler is not None:
+        crawler, _crawler = _crawler, None
+        await crawler.close()
+        logger.info("Closed shared crawler")
+
+async def close_crawler() -> None:
+    """Close the shared crawler from any event loop."""
+    await run_on_scrape_loop(_close_crawler())
+
+close_at_exit(_close_crawler)
+
+def _clean_products(products: list) -> list:
+    """Turn raw extracted products into the app's product format."""
+    # Only dump the products when debug logging is on
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # All products of one scrape share its timestamp
+    scraped_at = datetime.now().isoformat()
+    cleaned_products = []
+    for idx, product in enumerate(products):
+        if debug:
+            logger.debug("\nProcessing product %d:", idx + 1)
+            logger.debug("Raw product data: %s", orjson.dumps(product, option=orjson.OPT_INDENT_2).decode())
+        
+        # Clean the product data in place, dropping the raw price parts (the only private fields)
+        price_integer = product.pop('_price_integer', '')
+        price_decimal = product.pop('_price_decimal', '')
+        cleaned_product = product
+        
+        # Use the price computed during extraction, only parsing it here if that is missing
+        price = product.get('price') or parse_price(price_integer, price_decimal)
+        if price > 0:
+            cleaned_product['price'] = price
+            logger.debug("Added price: %s", price)
             
-            # Clean and process products
-            cleaned_products = []
-            for idx, product in enumerate(products):
-                logger.debug(f"\nProcessing product {idx + 1}:")
-                logger.debug(f"Raw product data: {json.dumps(product, indent=2)}")
-                
-                # Clean the product data
-                cleaned_product = {k: v for k, v in product.items() if not k.startswith('_')}
-                
-                # Parse price
-                price_integer = product.get('_price_integer', '')
-                price_decimal = product.get('_price_decimal', '')
-                price = parse_price(price_integer, price_decimal)
-                if price > 0:
-                    cleaned_product['price'] = price
-                    logger.debug(f"Added price: {price}")
-                else:
-                    logger.warning(f"Invalid price for product {idx + 1}: integer={price_integer}, decimal={price_decimal}")
-                
-                # Handle unit size and price per unit
-                unit_size = cleaned_product.get('unit_size', '')
-                if unit_size:
-                    # Extract grams from unit size
-                    grams = 0
-                    if 'g' in unit_size:
-                        match = re.search(r'(\d+)g', unit_size)
-                        if match:
-                            grams = float(match.group(1))
-                    
-                    if grams > 0:
-                        price_per_unit_value, price_per_unit_unit = calculate_price_per_unit(price, unit_size)
-                        cleaned_product['price_per_unit_value'] = price_per_unit_value
-                        cleaned_product['price_per_unit_unit'] = price_per_unit_unit
-                        cleaned_product['unit_price_display'] = f"€{price_per_unit_value:.2f} / {price_per_unit_unit}"
-                
-                # Extract product ID from image URL
-                image_url = product.get('image', '')
-                product_id = None
-                
-                if image_url:
-                    # Try to extract ID from image URL (format: .../140299_M/...)
-                    match = re.search(r'/(\d+)_M/', image_url)
-                    if match:
-                        product_id = match.group(1)
-                        logger.debug(f"Extracted product ID from image URL: {product_id}")
-                
-                # Add link using product ID
-                if product_id:
-                    name = product.get('name', '').lower()
-                    
-                    # Convert name to URL-friendly format
-                    url_name = name.lower()
-                    url_name = re.sub(r'[^a-z0-9\s-]', '', url_name)  # Remove special chars
-                    url_name = re.sub(r'\s+', '-', url_name.strip())  # Replace spaces with hyphens
-                    url_name = re.sub(r'-+', '-', url_name)  # Remove multiple hyphens
-                    
-                    # Add product type (tray) for packaged cheese
-                    if 'plakken' in name:
-                        url_name = f"{url_name}-tray"
-                    
-                    # Construct the link
-                    cleaned_product['link'] = f"https://www.plus.nl/product/{url_name}-{product_id}"
-                    logger.debug(f"Constructed link from ID: {cleaned_product['link']}")
-                else:
-                    logger.warning(f"No product ID found for product: {product.get('name', 'Unknown')}")
-                
-                cleaned_product['store'] = 'plus'
-                cleaned_product['scraped_at'] = datetime.now().isoformat()
-                cleaned_products.append(cleaned_product)
-                logger.debug(f"Final cleaned product: {json.dumps(cleaned_product, indent=2)}\n")
+            # Handle unit size and price per unit; without a price there is none, rather than a 0.0 that sorts first
+            price_per_unit_value, price_per_unit_unit = calculate_price_per_unit(price, cleaned_product.get('unit_size', ''))
+            if price_per_unit_value is not None:
+                cleaned_product['price_per_unit_value'] = price_per_unit_value
+                cleaned_product['price_per_unit_unit'] = price_per_unit_unit
+                cleaned_product['unit_price_display'] = f"€{price_per_unit_value:.2f} / {price_per_unit_unit}"
+        else:
+            logger.warning(f"Invalid price for product {idx + 1}: integer={price_integer}, decimal={price_decimal}")
+        
+        # Extract product ID from image URL
+        image_url = product.get('image', '')
+        product_id = None
+        
+        if image_url:
+            # Try to extract ID from image URL (format: .../140299_M/...)
+            match = _IMG_ID_RE.search(image_url)
+            if match:
+                product_id = match.group(1)
+                logger.debug("Extracted product ID from image URL: %s", product_id)
+        
+        # Add link using product ID
+        if product_id:
+            name = product.get('name', '').lower()
             
-            # Save to cache
-            save_to_cache(search_term, cleaned_products)
+            # Convert name to URL-friendly format
+            url_name = _slugify(name)
             
-            return cleaned_products
+            # Add product type (tray) for packaged cheese
+            if 'plakken' in name:
+                url_name = f"{url_name}-tray"
             
+            # Construct the link
+            cleaned_product['link'] = f"https://www.plus.nl/product/{url_name}-{product_id}"
+            logger.debug("Constructed link from ID: %s", cleaned_product['link'])
+        else:
+            logger.warning(f"No product ID found for product: {product.get('name', 'Unknown')}")
+        
+        cleaned_product['store'] = _STORE
+        cleaned_product['scraped_at'] = scraped_at
+        cleaned_products.append(cleaned_product)
+        if debug:
+            logger.debug("Final cleaned product: %s\n", orjson.dumps(cleaned_product, option=orjson.OPT_INDENT_2).decode())
+    
+    return cleaned_products
+
+def _products_from_result(result) -> list:
+    """Get the cleaned products from a crawl result."""
+    if not result.success:
+        logger.warning("Crawling %s failed: %s", result.url, result.error_message)
+    
+    if not result.extracted_content:
+        logger.warning("No products extracted")
+        return []
+    
+    products = orjson.loads(result.extracted_content)
+    logger.debug("Extracted %d products from page", len(products))
+    
+    if not products:
+        logger.warning("No products found in extracted content")
+        return []
+    
+    return _clean_products(products)
+
+async def _crawl_search_pages(urls: dict, concurrency: int) -> dict:
+    """Crawl search pages (URL -> search term) on the shared crawler and cache their products."""
+    results = {}
+    try:
+        # Load all search pages concurrently on the shared crawler
+        crawler = await _get_crawler()
+        crawled = await crawler.arun_many(
+            list(urls),
+            config=CrawlerRunConfig(
+                extraction_strategy=_EXTRACTION_STRATEGY,
+                cache_mode=CacheMode.BYPASS,
+                semaphore_count=concurrency,  # Pages arun_many keeps open at once
+                wait_for=".list-item.cart-item-wrapper.plp-item-wrapper",
+                js_code=_PLUS_JS_CODE
+            )
+        )
     except Exception as e:
         logger.error(f"Error scraping Plus products: {str(e)}")
-        return []
+        crawled = []
+    
+    # Results can come back in any order, so match them to their terms by URL
+    for result in crawled:
+        search_term = urls.get(result.url)
+        if search_term is None:
+            continue
+        try:
+            products = _products_from_result(result)
+        except Exception as e:
+            logger.error(f"Error scraping Plus products: {str(e)}")
+            continue
+        
+        # Save to cache
+        if products:
+            await save_to_cache(search_term, products)
+            results[search_term] = products
+    
+    # Cache failed and empty scrapes briefly, so they are not retried on every search
+    for search_term in urls.values():
+        if search_term not in results:
+            await save_to_cache(search_term, [], ttl=EMPTY_CACHE_TTL)
+            results[search_term] = []
+    
+    return results
+
+async def scrape_plus_products_many(search_terms: list[str], concurrency: int = 10) -> dict:
+    """
+    Scrape products from Plus supermarket for several search terms in one browser,
+    loading at most `concurrency` search pages at a time.
+    Returns a dict mapping each term to its products (empty if scraping it failed).
+    """
+    # The shared crawler lives on the scrape loop, so scrape there
+    return await run_on_scrape_loop(_scrape_plus_products_many(search_terms, concurrency))
+
+async def _scrape_plus_products_many(search_terms: list[str], concurrency: int) -> dict:
+    """Scrape several search terms on the scrape loop."""
+    results = {}
+    stale_terms = []
+    for search_term in dict.fromkeys(search_terms):
+        logger.info(f"Starting product search for '{search_term}'")
+        
+        # Check cache first
+        cache_file = get_cache_file(search_term)
+        if not await should_update_cache(cache_file):
+            cached_products = await load_from_cache(search_term)
+            if cached_products is not None:
+                results[search_term] = cached_products
+                continue
+        stale_terms.append(search_term)
+    
+    # Register in-flight scrapes only once nothing else is awaited before the try below,
+    # so every registered future is resolved
+    urls = {}
+    running = {}
+    for search_term in stale_terms:
+        # Wait for a scrape of this term that is already running instead of starting another
+        future = concurrent.futures.Future()
+        inflight = _inflight.setdefault(search_term, future)
+        if inflight is not future:
+            running[search_term] = inflight
+            continue
+        
+        # Construct search URL
+        urls[f"https://www.plus.nl/zoekresultaten?SearchTerm={search_term}"] = search_term
+    
+    try:
+        if urls:
+            results.update(await _crawl_search_pages(urls, concurrency))
+    finally:
+        # Hand the products to callers waiting on these terms, even if this scrape was cancelled
+        for search_term in urls.values():
+            _inflight.pop(search_term).set_result(results.get(search_term, []))
+    
+    for search_term, future in running.items():
+        # Shield the shared future so a cancelled waiter doesn't cancel it for the others
+        results[search_term] = await asyncio.shield(asyncio.wrap_future(future))
+    
+    return {search_term: results.get(search_term, []) for search_term in dict.fromkeys(search_terms)}
+
+async def scrape_plus_products(search_term: str) -> list:
+    """Scrape products from Plus supermarket."""
+    return (await scrape_plus_products_many([search_term]))[search_term]
 
 # Test the scraper
 if __name__ == "__main__":
@@ -450,14 +586,17 @@ if __name__ == "__main__":
     
     async def test_scraper():
         # Test with a specific search term
-        products = await scrape_plus_products("kaas plakken")
+        try:
+            products = await scrape_plus_products("kaas plakken")
+        finally:
+            await close_crawler()
         
         print("\n=== SCRAPING RESULTS ===")
         print(f"Found {len(products)} products")
         
         if products:
             print("\nFirst product details:")
-            print(json.dumps(products[0], indent=2))
+            print(orjson.dumps(products[0], option=orjson.OPT_INDENT_2).decode())
     
     # Run the test
     asyncio.run(test_scraper())
@@ -0,0 +1,44 @@
+import asyncio
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# One long-lived event loop, on a daemon thread, that all scrapes run on.
+# Browsers and HTTP clients are bound to the loop that opened them, and the app
+# runs each request on a loop of its own, so they can only be shared across
+# requests (and closed again) from a loop that outlives the requests.
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_scrape_loop() -> asyncio.AbstractEventLoop:
+    """Get the shared scrape loop, starting its thread on first use"""
+    global _loop
+
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="scrape-loop", daemon=True).start()
+            _loop = loop
+
+    return _loop
+
+async def run_on_scrape_loop(coro):
+    """Run a coroutine on the scrape loop and wait for its result from whichever loop is running"""
+    loop = get_scrape_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    # Cancelling the wrapped future also cancels the task on the scrape loop
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+def close_at_exit(close, timeout: float = 30) -> None:
+    """Run a cleanup coroutine function on the scrape loop when the interpreter exits"""
+    def run():
+        if _loop is not None and _loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(close(), _loop).result(timeout)
+            except Exception as e:
+                logger.error("Error during scraper cleanup: %s", e)
+
+    atexit.register(run)
@@ -1,5 +1,5 @@
 import pytest
-from src.app import format_price, format_unit_size, format_price_per_unit
+from src.app import format_price, format_unit_size, format_price_per_unit, format_product
 
 @pytest.mark.parametrize("input_price,expected", [
     # Common Dutch price formats
@@ -23,6 +23,8 @@ def test_format_price(input_price, expected):
     ("500g", "500 g"),
     ("1kg", "1 kg"),
     ("1500g", "1.5 kg"),
+    ("1,5 kg", "1.5 kg"),
+    ("410", "410 g"),
     # Per unit prices
     ("per 100 gram", "Per 100 g"),
     ("per 1 kg", "Per 1 kg"),
@@ -45,6 +47,9 @@ def test_format_unit_size(input_size, expected):
     (5.00, "500g", "€10,00/kg"),
     (10.00, "1kg", "€10,00/kg"),
     (3.00, "250g", "€12,00/kg"),
+    (3.00, "1,5 kg", "€2,00/kg"),
+    # Per slice pricing
+    (4.00, "10 plakken", "€0,40/plak"),
     # Multipack pricing
     (6.00, "6x500g", "€2,00/kg"),
     (4.00, "4x125g", "€8,00/kg"),
@@ -55,4 +60,11 @@ def test_format_unit_size(input_size, expected):
     (5.00, "", "€5,00")
 ])
 def test_format_price_per_unit(price, unit_size, expected):
-    assert format_price_per_unit(price, unit_size) == expected 
\ No newline at end of file
+    assert format_price_per_unit(price, unit_size) == expected 
+
+def test_format_product(sample_product):
+    assert format_product(sample_product) == {
+        'price': '2,99',
+        'unit': '500 g',
+        'ppu': '€5,98/kg'
+    }
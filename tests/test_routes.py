@@ -1,3 +1,7 @@
+import json
+from collections import OrderedDict
+import src.app as app_module
+
 class TestRoutes:
     def test_index_route(self, client):
         response = client.get('/')
@@ -82,4 +86,74 @@ class TestRoutes:
         response = client.post('/clear_list')
         assert response.status_code == 200
         json_data = response.get_json()
-        assert not json_data.get('grocery_list', []) 
\ No newline at end of file
+        assert not json_data.get('grocery_list', []) 
+    def test_search_products_stream(self, client, monkeypatch):
+        async def scrape_ah(term):
+            return [{'name': 'AH Kaas', 'price': 4.0, 'unit_size': '500 g', 'store': 'ah'}]
+
+        async def scrape_jumbo(term):
+            raise RuntimeError("Jumbo is down")
+
+        async def scrape_plus(term):
+            return [
+                {'name': 'Plus Kaas', 'price': 3.0, 'unit_size': '1 kg', 'store': 'plus'},
+                {'name': 'Plus Kaasjes', 'price': 2.0, 'unit_size': '6 stuks', 'store': 'plus'}
+            ]
+
+        monkeypatch.setattr('src.app.scrape_ah_products', scrape_ah)
+        monkeypatch.setattr('src.app.scrape_jumbo_products', scrape_jumbo)
+        monkeypatch.setattr('src.app.scrape_plus_products', scrape_plus)
+
+        response = client.post('/search_products', json={
+            'search_term': 'kaas',
+            'stores': ['ah', 'jumbo', 'plus'],
+            'stream': True
+        })
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+
+        # One object per store that succeeded; the failing store is left out
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert len(lines) == 2
+        stores = {}
+        for line in lines:
+            assert line['count'] == len(line['products'])
+            for product in line['products']:
+                stores.setdefault(product['store'], []).append(product)
+        assert set(stores) == {'ah', 'plus'}
+        assert [p['name'] for p in stores['plus']] == ['Plus Kaasjes', 'Plus Kaas']
+        assert stores['ah'][0]['price_per_unit'] == 8.0
+
+    def test_carts_are_per_session(self, app, monkeypatch):
+        monkeypatch.setattr('src.app._carts', OrderedDict())
+        first, second = app.test_client(), app.test_client()
+        first.post('/add_item', data={'item': 'milk'})
+        second.post('/add_item', data={'item': 'bread'})
+
+        response = first.post('/add_item', data={'item': 'eggs'})
+        assert response.get_json()['grocery_list'] == ['milk', 'eggs']
+        response = second.post('/remove_item', data={'item': 'milk'})
+        assert response.get_json()['grocery_list'] == ['bread']
+
+    def test_reading_a_cart_does_not_store_it(self, client, monkeypatch):
+        monkeypatch.setattr('src.app._carts', OrderedDict())
+        assert client.get('/').status_code == 200
+        client.post('/remove_item', data={'item': 'milk'})
+        assert not app_module._carts
+
+        client.post('/add_item', data={'item': 'milk'})
+        assert len(app_module._carts) == 1
+
+    def test_oldest_cart_is_evicted(self, app, monkeypatch):
+        monkeypatch.setattr('src.app._carts', OrderedDict())
+        monkeypatch.setattr('src.app.CART_MEMORY_SIZE', 2)
+        clients = [app.test_client() for _ in range(3)]
+        for i, cart_client in enumerate(clients):
+            cart_client.post('/add_item', data={'item': f'item{i}'})
+        assert len(app_module._carts) == 2
+
+        # The first cart was evicted, the others are intact
+        response = clients[0].post('/add_item', data={'item': 'milk'})
+        assert response.get_json()['grocery_list'] == ['milk']
+        response = clients[2].post('/add_item', data={'item': 'milk'})
+        assert response.get_json()['grocery_list'] == ['item2', 'milk']
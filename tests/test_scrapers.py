@@ -1,8 +1,8 @@
 import pytest
 import asyncio
 from src.ah_scraper import scrape_ah_products
-from src.jumbo_scraper import scrape_jumbo_products
-from src.plus_scraper import scrape_plus_products
+from src.jumbo_scraper import scrape_jumbo_products, extract_unit_size
+from src.plus_scraper import scrape_plus_products, extract_unit_size as plus_extract_unit_size
 
 @pytest.mark.asyncio
 async def test_ah_scraper():
@@ -26,6 +26,36 @@ async def test_jumbo_scraper():
         assert all('price' in p for p in products)
         assert all('store' in p for p in products)
 
+@pytest.mark.parametrize("name,expected", [
+    ("Jumbo Jonge Kaas 6 stuks", "6 stuks"),
+    ("Jumbo Ham 10 plakken", "10 plakken"),
+    ("Jumbo Elstar Appels 1,5 kg", "1500.0g"),
+    ("Jumbo Geraspte Kaas 400 gram", "400g"),
+    ("Jumbo Volkoren Brood heel", "800g"),
+    ("Jumbo Wit Brood half", "400g"),
+    ("Jumbo Komkommer", ""),
+    ("", "")
+])
+def test_extract_unit_size(name, expected):
+    assert extract_unit_size(name) == expected
+
+@pytest.mark.parametrize("value,expected", [
+    ("Per 400 g", "400g"),
+    ("per 1,5 kg", "1500g"),
+    ("6 stuks", "6 stuk"),
+    ("2 x stuk", "2 stuk"),
+    ("10 plakken", "10 plakken"),
+    ("6 stuks 400 gram", "400g"),
+    ("1 kilo", "1000g"),
+    ("2 kilograms", "2000g"),
+    ("400 grams", "400g"),
+    ("2 kaasjes", "2 kaasjes"),
+    ("410", "410g"),
+    ("", "")
+])
+def test_plus_extract_unit_size(value, expected):
+    assert plus_extract_unit_size(value) == expected
+
 @pytest.mark.asyncio
 async def test_plus_scraper():
     search_term = "kaas"